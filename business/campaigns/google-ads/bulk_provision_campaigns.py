@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Bulk-create Google Ads App campaigns from a CSV spec using BatchJobService
+
+Each row becomes the same graph create_ios_campaign.py builds for App-iOS
+(built with its fill_* builders):
+Budget -> Campaign (PAUSED) -> Geo/Language criteria -> Ad Group -> App Ad.
+The operations of up to --per-job campaigns go into one batch job (linked
+by temporary negative IDs); the jobs run and are polled concurrently, and
+the outcome is reported per row. A job costs about four API calls
+(create, add operations, run, list results), however many campaigns it
+holds, so 50 campaigns take 4 calls instead of 250.
+
+Batch jobs are not atomic: a failed row may leave part of its graph
+(e.g. budget and campaign) behind. --report lists every resource created
+per row, so it can be fixed or removed.
+
+Spec columns (lists are separated by "|"):
+  name            campaign name (also used for the budget)
+  app_id          App Store numeric ID or Play Store package name
+  app_store       APPLE_APP_STORE or GOOGLE_APP_STORE
+  daily_budget    in the account currency, e.g. 10.00
+  geo_target_ids  geo target constants, e.g. 2076 (Brazil)
+  language_ids    language constants, e.g. 1014 (Portuguese)
+  headlines       up to 5, 30 chars each
+  descriptions    up to 5, 90 chars each
+
+Usage:
+    python3 business/campaigns/google-ads/bulk_provision_campaigns.py campaigns.csv
+    python3 business/campaigns/google-ads/bulk_provision_campaigns.py campaigns.csv \\
+        --per-job 25 --report results.csv
+    python3 business/campaigns/google-ads/bulk_provision_campaigns.py \\
+        business/campaigns/google-ads/campaigns.example.csv --fake
+"""
+
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import create_ios_campaign as ios
+
+# === Config ===
+CAMPAIGNS_PER_JOB = 100
+OPERATIONS_PER_ADD = 1000  # per AddBatchJobOperations request
+POLL_WORKERS = 8
+JOB_TIMEOUT = 30 * 60  # seconds to wait for a batch job
+
+MAX_HEADLINES = 5
+MAX_DESCRIPTIONS = 5
+REQUIRED_COLUMNS = [
+    'name', 'app_id', 'app_store', 'daily_budget',
+    'geo_target_ids', 'language_ids', 'headlines', 'descriptions',
+]
+APP_STORES = ('APPLE_APP_STORE', 'GOOGLE_APP_STORE')
+
+
+# === Spec ===
+
+def _split(value):
+    return [part.strip() for part in value.split('|') if part.strip()]
+
+
+def read_spec(path):
+    """Read and validate the campaign spec; raises ValueError naming the bad line."""
+    with open(path, encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+
+        rows = []
+        for index, raw in enumerate(reader, start=1):
+            line = reader.line_num
+            if None in raw:
+                raise ValueError(
+                    f"{path}:{line}: row {index} has more fields than columns"
+                    " (quote values that contain commas)"
+                )
+            if None in raw.values():
+                raise ValueError(f"{path}:{line}: row {index} has fewer fields than columns")
+            try:
+                row = {
+                    'line': line,
+                    'name': raw['name'].strip(),
+                    'app_id': raw['app_id'].strip(),
+                    'app_store': raw['app_store'].strip().upper(),
+                    'amount_micros': round(float(raw['daily_budget']) * 1_000_000),
+                    'geo_target_ids': [int(v) for v in _split(raw['geo_target_ids'])],
+                    'language_ids': [int(v) for v in _split(raw['language_ids'])],
+                    'headlines': _split(raw['headlines']),
+                    'descriptions': _split(raw['descriptions']),
+                }
+            except ValueError as e:
+                raise ValueError(f"{path}:{line}: {e}") from None
+            if not row['name'] or not row['app_id']:
+                raise ValueError(f"{path}:{line}: name and app_id are required")
+            if row['app_store'] not in APP_STORES:
+                raise ValueError(f"{path}:{line}: app_store must be one of {', '.join(APP_STORES)}")
+            if not 0 < len(row['headlines']) <= MAX_HEADLINES:
+                raise ValueError(f"{path}:{line}: expected 1-{MAX_HEADLINES} headlines")
+            if not 0 < len(row['descriptions']) <= MAX_DESCRIPTIONS:
+                raise ValueError(f"{path}:{line}: expected 1-{MAX_DESCRIPTIONS} descriptions")
+            rows.append(row)
+
+    names = [row['name'] for row in rows]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate campaign names {', '.join(duplicates)}")
+    return rows
+
+
+# === Operations ===
+
+def campaign_operations(client, customer_id, row, next_temp_id):
+    """Build the MutateOperations for one spec row, in dependency order.
+
+    next_temp_id() hands out the job's temporary IDs (-1, -2, ...), which
+    must be unique within a batch job. Returns [(kind, operation)].
+    """
+    budget_resource = client.get_service('CampaignBudgetService').campaign_budget_path(
+        customer_id, next_temp_id()
+    )
+    campaign_resource = client.get_service('CampaignService').campaign_path(
+        customer_id, next_temp_id()
+    )
+    ad_group_resource = client.get_service('AdGroupService').ad_group_path(
+        customer_id, next_temp_id()
+    )
+    operations = []
+
+    op = client.get_type('MutateOperation')
+    budget = op.campaign_budget_operation.create
+    budget.resource_name = budget_resource
+    ios.fill_budget(budget, row['name'], row['amount_micros'], client=client)
+    operations.append(('budget', op))
+
+    op = client.get_type('MutateOperation')
+    campaign = op.campaign_operation.create
+    campaign.resource_name = campaign_resource
+    ios.fill_campaign(campaign, budget_resource, row['name'], row['app_id'], row['app_store'],
+                      client=client)
+    operations.append(('campaign', op))
+
+    for geo_id in row['geo_target_ids']:
+        op = client.get_type('MutateOperation')
+        ios.fill_geo_criterion(op.campaign_criterion_operation.create, campaign_resource, geo_id,
+                               client=client)
+        operations.append(('location', op))
+
+    for language_id in row['language_ids']:
+        op = client.get_type('MutateOperation')
+        ios.fill_language_criterion(op.campaign_criterion_operation.create, campaign_resource,
+                                    language_id, client=client)
+        operations.append(('language', op))
+
+    op = client.get_type('MutateOperation')
+    ad_group = op.ad_group_operation.create
+    ad_group.resource_name = ad_group_resource
+    ios.fill_ad_group(ad_group, campaign_resource, client=client)
+    operations.append(('ad_group', op))
+
+    op = client.get_type('MutateOperation')
+    ios.fill_app_ad(op.ad_group_ad_operation.create, ad_group_resource, row['headlines'],
+                    row['descriptions'], client=client)
+    operations.append(('ad', op))
+
+    return operations
+
+
+RESULT_FIELDS = {
+    'budget': 'campaign_budget_result',
+    'campaign': 'campaign_result',
+    'ad_group': 'ad_group_result',
+    'ad': 'ad_group_ad_result',
+}
+
+
+# === Batch jobs ===
+
+def run_batch_job(client, customer_id, rows, timeout=JOB_TIMEOUT):
+    """Create, fill, run and wait for one batch job; returns a result dict per row."""
+    batch_job_service = client.get_service('BatchJobService')
+    temp_ids = iter(range(-1, -10**9, -1))
+    operations, owners = [], []
+    for index, row in enumerate(rows):
+        for kind, op in campaign_operations(client, customer_id, row, lambda: next(temp_ids)):
+            operations.append(op)
+            owners.append((index, kind))
+
+    job_operation = client.get_type('BatchJobOperation')
+    client.copy_from(job_operation.create, client.get_type('BatchJob'))
+    response = batch_job_service.mutate_batch_job(customer_id=customer_id, operation=job_operation)
+    job = response.result.resource_name
+
+    sequence_token = None
+    for start in range(0, len(operations), OPERATIONS_PER_ADD):
+        request = {'resource_name': job, 'mutate_operations': operations[start:start + OPERATIONS_PER_ADD]}
+        if sequence_token:
+            request['sequence_token'] = sequence_token
+        sequence_token = batch_job_service.add_batch_job_operations(request=request).next_sequence_token
+
+    print(f"  {job}: running {len(rows)} campaigns ({len(operations)} operations)")
+    started = time.perf_counter()
+    batch_job_service.run_batch_job(resource_name=job).result(timeout=timeout)
+    print(f"  {job}: done in {time.perf_counter() - started:.1f}s")
+
+    results = [
+        {'line': row['line'], 'name': row['name'], 'job': job, 'resources': {}, 'errors': []}
+        for row in rows
+    ]
+    pager = batch_job_service.list_batch_job_results(request={'resource_name': job, 'page_size': 1000})
+    for result in pager:
+        index, kind = owners[result.operation_index]
+        if result.status.code:
+            results[index]['errors'].append(f"{kind}: {result.status.message}")
+        elif kind in RESULT_FIELDS:
+            field = getattr(result.mutate_operation_response, RESULT_FIELDS[kind])
+            results[index]['resources'][kind] = field.resource_name
+
+    for result in results:
+        # A campaign only counts when all of its operations went through
+        complete = set(RESULT_FIELDS) <= set(result['resources'])
+        if not complete and not result['errors']:
+            result['errors'].append('no result returned for some operations')
+        result['status'] = 'OK' if complete and not result['errors'] else 'FAILED'
+    return results
+
+
+def provision(client, rows, customer_id=ios.CUSTOMER_ID, per_job=CAMPAIGNS_PER_JOB,
+              workers=POLL_WORKERS, timeout=JOB_TIMEOUT):
+    """Provision every spec row in batch jobs of per_job campaigns, run concurrently.
+
+    client is a GoogleAdsClient or anything with the same get_service /
+    get_type / enums surface (see fake_ads.py). Returns one result per row,
+    in spec order.
+    """
+    chunks = [rows[i:i + per_job] for i in range(0, len(rows), per_job)]
+    print(f"\n=== Submitting {len(rows)} campaigns in {len(chunks)} batch job(s) ===")
+
+    def run(chunk):
+        try:
+            return run_batch_job(client, customer_id, chunk, timeout)
+        except Exception as e:
+            # A job that fails as a whole fails all of its rows, not the run
+            return [
+                {'line': row['line'], 'name': row['name'], 'job': None, 'resources': {},
+                 'errors': [f"{type(e).__name__}: {e}"], 'status': 'FAILED'}
+                for row in chunk
+            ]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        return [result for results in pool.map(run, chunks) for result in results]
+
+
+# === Report ===
+
+def print_report(results):
+    print("\n=== Results ===")
+    width = max([len(r['name']) for r in results] + [8])
+    for r in results:
+        if r['status'] == 'OK':
+            detail = r['resources']['campaign']
+        else:
+            # Later operations of the row fail on the first one's missing resource
+            detail = r['errors'][0] + (f" (+{len(r['errors']) - 1} dependent)" if len(r['errors']) > 1 else '')
+        print(f"  {r['line']:>4}  {r['name']:<{width}}  {r['status']:<6}  {detail}")
+    failed = sum(r['status'] != 'OK' for r in results)
+    print(f"\n  {len(results) - failed} created, {failed} failed")
+
+
+def write_report(path, results):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', 'name', 'status', 'job'] + [f"{kind}_resource" for kind in RESULT_FIELDS] + ['errors'])
+        for r in results:
+            writer.writerow(
+                [r['line'], r['name'], r['status'], r['job'] or '']
+                + [r['resources'].get(kind, '') for kind in RESULT_FIELDS]
+                + ['; '.join(r['errors'])]
+            )
+    print(f"  Report saved: {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('spec', help='CSV file with one campaign per row')
+    parser.add_argument(
+        '--customer-id', default=ios.CUSTOMER_ID,
+        help=f"Google Ads customer ID (default: {ios.CUSTOMER_ID})",
+    )
+    parser.add_argument(
+        '--config', default=ios.CONFIG_PATH,
+        help=f"google-ads.yaml path (default: {ios.CONFIG_PATH})",
+    )
+    parser.add_argument(
+        '--per-job', type=int, default=CAMPAIGNS_PER_JOB,
+        help=f"Campaigns per batch job (default: {CAMPAIGNS_PER_JOB})",
+    )
+    parser.add_argument(
+        '--workers', type=int, default=POLL_WORKERS,
+        help=f"Batch jobs run and polled at once (default: {POLL_WORKERS})",
+    )
+    parser.add_argument(
+        '--timeout', type=int, default=JOB_TIMEOUT,
+        help=f"Seconds to wait for each batch job (default: {JOB_TIMEOUT})",
+    )
+    parser.add_argument('--report', metavar='CSV', help='Also write the per-row results to CSV')
+    parser.add_argument('--fake', action='store_true', help='Run against the in-memory fake in fake_ads.py')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print("=" * 60)
+    print("  Google Ads - Bulk App Campaign Provisioning")
+    print("=" * 60)
+
+    try:
+        rows = read_spec(args.spec)
+    except (OSError, ValueError) as e:
+        print(f"\n  ERROR: {e}")
+        sys.exit(1)
+
+    if args.fake:
+        import fake_ads
+        client = fake_ads.FakeGoogleAdsClient()
+    else:
+        ios.CONFIG_PATH = args.config
+        client = ios.get_client()
+
+    results = provision(client, rows, args.customer_id, args.per_job, args.workers, args.timeout)
+    print_report(results)
+    if args.report:
+        write_report(args.report, results)
+    if args.fake:
+        print(f"  API calls: {client.calls}")
+    if any(r['status'] != 'OK' for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,23 @@ Create Google Ads App-iOS Campaign
 Replicates the successful App-Android campaign for iOS.
 Creates: Budget -> Campaign (PAUSED) -> Targeting -> Ad Group -> App Ad
 
+By default the whole graph is sent as one atomic GoogleAdsService.Mutate
+call, linked by temporary (negative) resource IDs: one round trip, and if
+any operation fails nothing is created. --step-by-step makes one call per
+step instead, as the script originally did.
+
+Every mutation is recorded in a journal (--journal, JSON) with the
+resource names it created and a fingerprint of the request. A rerun after
+a failure skips the steps already done and resumes from the failed one;
+a step whose settings changed since it ran stops the run instead of
+creating a duplicate.
+
+Usage:
+    python3 business/campaigns/google-ads/create_ios_campaign.py
+    python3 business/campaigns/google-ads/create_ios_campaign.py --step-by-step
+    python3 business/campaigns/google-ads/create_ios_campaign.py --verify 23598117814
+    python3 business/campaigns/google-ads/create_ios_campaign.py --dry-run
+
 Created on 23/02/2026. Results:
   - Campaign ID: 23598117814
   - Budget ID: 15389228376
@@ -15,58 +32,159 @@ Created on 23/02/2026. Results:
 import warnings
 warnings.filterwarnings('ignore')
 
+import argparse
+import functools
+import hashlib
+import json
+import os
 import sys
-from google.ads.googleads.client import GoogleAdsClient
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # === Config ===
-CUSTOMER_ID = '6735014760'
-CONFIG_PATH = '/Users/rafaeldl/.google-ads.yaml'
+# --customer-id / --config override these; the google.ads package (and gRPC)
+# is only imported when the first service is needed.
+CUSTOMER_ID = os.environ.get('GOOGLE_ADS_CUSTOMER_ID', '6735014760')
+CONFIG_PATH = os.environ.get(
+    'GOOGLE_ADS_CONFIGURATION_FILE_PATH', os.path.expanduser('~/.google-ads.yaml')
+)
 APP_ID = '1534604555'  # App Store numeric ID
-
-client = GoogleAdsClient.load_from_storage(CONFIG_PATH)
-ga_service = client.get_service('GoogleAdsService')
-
-
-def create_budget():
-    """Step 1: Create campaign budget - R$10/day"""
-    print("\n=== Step 1: Creating Campaign Budget ===")
-
-    budget_service = client.get_service('CampaignBudgetService')
-    budget_operation = client.get_type('CampaignBudgetOperation')
-
-    budget = budget_operation.create
-    budget.name = 'App-iOS'
-    budget.amount_micros = 10_000_000  # R$10/day
+CAMPAIGN_NAME = 'App-iOS'
+DAILY_BUDGET_MICROS = 10_000_000  # R$10/day
+GEO_TARGET_ID = 2076  # Brazil
+LANGUAGE_ID = 1014  # Portuguese
+AD_GROUP_NAME = 'Ad group 1'
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.create_ios_campaign-journal.json')
+
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """The GoogleAdsClient, loaded from CONFIG_PATH on first use and shared."""
+    from google.ads.googleads.client import GoogleAdsClient
+    return GoogleAdsClient.load_from_storage(CONFIG_PATH)
+
+
+@functools.lru_cache(maxsize=None)
+def get_service(name):
+    """A service client, created once and shared across steps."""
+    return get_client().get_service(name)
+
+
+class Journal:
+    """Resources created per step, with the fingerprint of the request that created them.
+
+    Saved (atomically) after every step, keyed by customer ID. With no path
+    it only lives in memory.
+    """
+
+    def __init__(self, path=None, customer_id=CUSTOMER_ID):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        self.steps = self.data.setdefault(customer_id, {})
+
+    @staticmethod
+    def fingerprint(operations):
+        h = hashlib.sha256()
+        for operation in operations:
+            h.update(type(operation).serialize(operation))
+        return h.hexdigest()
+
+    def run(self, step, operations, mutate):
+        """Return the journaled result of step, or call mutate(operations) and record it."""
+        fingerprint = self.fingerprint(operations)
+        done = self.steps.get(step)
+        if done is not None:
+            if done['fingerprint'] != fingerprint:
+                raise RuntimeError(
+                    f"Step '{step}' already ran with different settings ({done['result']}). "
+                    f"Remove it from {self.path} to create it again."
+                )
+            print(f"  Already done on {done['created_at']} (journal), skipping")
+            return done['result']
+
+        result = mutate(operations)
+        self.steps[step] = {
+            'fingerprint': fingerprint,
+            'result': result,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self.save()
+        return result
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp, self.path)
+
+
+journal = Journal()
+
+
+def resource_names(response):
+    return [result.resource_name for result in response.results]
+
+
+# Temporary IDs link the operations of an atomic mutate before real IDs exist
+BUDGET_TEMP_ID = -1
+CAMPAIGN_TEMP_ID = -2
+AD_GROUP_TEMP_ID = -3
+
+# Headlines (max 5 for app ads, 30 chars each)
+HEADLINES = [
+    'Ordem de serviço no app',
+    'Controle sua assistência',
+    'OS, clientes e histórico',
+    'Checklist e fotos na OS',
+    'App para assistência técnica',
+]
+
+# Descriptions (max 5, 90 chars each)
+DESCRIPTIONS = [
+    'Crie OS, registre serviços e acompanhe o status. Organização na rotina.',
+    'Clientes, aparelhos e histórico em um só lugar. Simples e rápido.',
+    'Faça orçamento, registre fotos e finalize serviços com agilidade.',
+    'Organize entradas e saídas e evite retrabalho. Baixe e teste grátis.',
+    'Funciona offline e facilita o atendimento. Gestão prática no dia a dia.',
+]
+
+
+# === Resource builders (shared by the step-by-step and atomic modes) ===
+# The defaults describe App-iOS; bulk_provision_campaigns.py passes its own
+# client and spec values so both scripts build the same resources.
+
+def _service(client, name):
+    return client.get_service(name) if client else get_service(name)
+
+
+def fill_budget(budget, name=CAMPAIGN_NAME, amount_micros=DAILY_BUDGET_MICROS, client=None):
+    """Campaign budget - R$10/day"""
+    client = client or get_client()
+    budget.name = name
+    budget.amount_micros = amount_micros
     budget.delivery_method = client.enums.BudgetDeliveryMethodEnum.STANDARD
     budget.explicitly_shared = False
 
-    response = budget_service.mutate_campaign_budgets(
-        customer_id=CUSTOMER_ID,
-        operations=[budget_operation]
-    )
-
-    budget_resource = response.results[0].resource_name
-    print(f"  Budget created: {budget_resource}")
-    return budget_resource
-
 
-def create_campaign(budget_resource):
-    """Step 2: Create campaign (PAUSED) with App Campaign settings"""
-    print("\n=== Step 2: Creating Campaign (PAUSED) ===")
-
-    campaign_service = client.get_service('CampaignService')
-    campaign_operation = client.get_type('CampaignOperation')
-
-    campaign = campaign_operation.create
-    campaign.name = 'App-iOS'
+def fill_campaign(campaign, budget_resource, name=CAMPAIGN_NAME, app_id=APP_ID,
+                  app_store='APPLE_APP_STORE', client=None):
+    """Campaign (PAUSED) with App Campaign settings"""
+    client = client or get_client()
+    campaign.name = name
     campaign.status = client.enums.CampaignStatusEnum.PAUSED
     campaign.advertising_channel_type = client.enums.AdvertisingChannelTypeEnum.MULTI_CHANNEL
     campaign.advertising_channel_sub_type = client.enums.AdvertisingChannelSubTypeEnum.APP_CAMPAIGN
     campaign.campaign_budget = budget_resource
 
     # App campaign settings
-    campaign.app_campaign_setting.app_id = APP_ID
-    campaign.app_campaign_setting.app_store = client.enums.AppCampaignAppStoreEnum.APPLE_APP_STORE
+    campaign.app_campaign_setting.app_id = app_id
+    campaign.app_campaign_setting.app_store = getattr(client.enums.AppCampaignAppStoreEnum, app_store)
     campaign.app_campaign_setting.bidding_strategy_goal_type = (
         client.enums.AppCampaignBiddingStrategyGoalTypeEnum
         .OPTIMIZE_INSTALLS_WITHOUT_TARGET_INSTALL_COST
@@ -81,126 +199,263 @@ def create_campaign(budget_resource):
         .DOES_NOT_CONTAIN_EU_POLITICAL_ADVERTISING
     )
 
-    response = campaign_service.mutate_campaigns(
-        customer_id=CUSTOMER_ID,
-        operations=[campaign_operation]
+
+def fill_geo_criterion(criterion, campaign_resource, geo_target_id=GEO_TARGET_ID, client=None):
+    """Geo targeting - Brazil"""
+    service = _service(client, 'GeoTargetConstantService')
+    criterion.campaign = campaign_resource
+    criterion.location.geo_target_constant = service.geo_target_constant_path(geo_target_id)
+
+
+def fill_language_criterion(criterion, campaign_resource, language_id=LANGUAGE_ID, client=None):
+    """Language targeting - Portuguese"""
+    service = _service(client, 'GoogleAdsService')
+    criterion.campaign = campaign_resource
+    criterion.language.language_constant = service.language_constant_path(language_id)
+
+
+def fill_ad_group(ad_group, campaign_resource, name=AD_GROUP_NAME, client=None):
+    """Ad group (ENABLED)"""
+    client = client or get_client()
+    ad_group.name = name
+    ad_group.campaign = campaign_resource
+    ad_group.status = client.enums.AdGroupStatusEnum.ENABLED
+
+
+def fill_app_ad(ad_group_ad, ad_group_resource, headlines=HEADLINES, descriptions=DESCRIPTIONS,
+                client=None):
+    """App Ad with headlines and descriptions"""
+    client = client or get_client()
+    ad_group_ad.ad_group = ad_group_resource
+    ad_group_ad.status = client.enums.AdGroupAdStatusEnum.ENABLED
+
+    for headline_text in headlines:
+        headline = client.get_type('AdTextAsset')
+        headline.text = headline_text
+        ad_group_ad.ad.app_ad.headlines.append(headline)
+
+    for desc_text in descriptions:
+        desc = client.get_type('AdTextAsset')
+        desc.text = desc_text
+        ad_group_ad.ad.app_ad.descriptions.append(desc)
+
+
+# === Plan: the operation graph, described without the API client ===
+
+def operation_plan(step_by_step=False):
+    """The mutate operations of a run, per journal step: [(step, [description, ...])].
+
+    Mirrors the fill_* builders from the config constants alone, so it needs
+    neither credentials nor the google.ads package.
+    """
+    if step_by_step:
+        budget, campaign, ad_group = '<budget>', '<campaign>', '<ad group>'
+    else:
+        budget = f"customers/{CUSTOMER_ID}/campaignBudgets/{BUDGET_TEMP_ID}"
+        campaign = f"customers/{CUSTOMER_ID}/campaigns/{CAMPAIGN_TEMP_ID}"
+        ad_group = f"customers/{CUSTOMER_ID}/adGroups/{AD_GROUP_TEMP_ID}"
+
+    steps = [
+        ('budget', [
+            f"CampaignBudget {budget}: '{CAMPAIGN_NAME}', "
+            f"R${DAILY_BUDGET_MICROS / 1_000_000:.2f}/day, STANDARD",
+        ]),
+        ('campaign', [
+            f"Campaign {campaign}: '{CAMPAIGN_NAME}', PAUSED, MULTI_CHANNEL/APP_CAMPAIGN, "
+            f"app {APP_ID} (APPLE_APP_STORE), budget {budget}",
+        ]),
+        ('targeting', [
+            f"CampaignCriterion: {campaign} location geoTargetConstants/{GEO_TARGET_ID}",
+            f"CampaignCriterion: {campaign} language languageConstants/{LANGUAGE_ID}",
+        ]),
+        ('ad_group', [f"AdGroup {ad_group}: '{AD_GROUP_NAME}', ENABLED, campaign {campaign}"]),
+        ('app_ad', [
+            f"AdGroupAd: ad group {ad_group}, ENABLED, "
+            f"{len(HEADLINES)} headlines, {len(DESCRIPTIONS)} descriptions",
+        ]),
+    ]
+    if not step_by_step:
+        steps = [('graph', [line for _, lines in steps for line in lines])]
+    return steps + [('enable', [f"Campaign {campaign}: status -> ENABLED"])]
+
+
+def print_plan(step_by_step=False):
+    """Print the operation graph and which steps the journal would skip."""
+    mode = 'one call per step' if step_by_step else 'one atomic GoogleAdsService.Mutate'
+    print(f"\n=== Plan for customer {CUSTOMER_ID} ({mode}) ===")
+    calls = 0
+    number = 1
+    for step, lines in operation_plan(step_by_step):
+        done = journal.steps.get(step)
+        calls += not done
+        status = f"done {done['created_at']}, skipped" if done else 'to run'
+        print(f"\n  [{step}] {status}")
+        if step == 'enable':
+            print(f"  (before it: {len(VERIFY_QUERIES)} concurrent search_stream verification queries)")
+        for line in lines:
+            print(f"    {number}. {line}")
+            number += 1
+    print(f"\n  Mutate calls to make: {calls}")
+
+
+# === Atomic mode: one GoogleAdsService.Mutate call ===
+
+def build_mutate_operations():
+    """Budget -> Campaign -> Criteria -> Ad Group -> App Ad, linked by temporary IDs.
+
+    Operations run in list order, so each one may reference the temporary
+    resource names of those before it.
+    """
+    client = get_client()
+    budget_resource = get_service('CampaignBudgetService').campaign_budget_path(
+        CUSTOMER_ID, BUDGET_TEMP_ID
     )
+    campaign_resource = get_service('CampaignService').campaign_path(
+        CUSTOMER_ID, CAMPAIGN_TEMP_ID
+    )
+    ad_group_resource = get_service('AdGroupService').ad_group_path(
+        CUSTOMER_ID, AD_GROUP_TEMP_ID
+    )
+
+    budget_op = client.get_type('MutateOperation')
+    budget = budget_op.campaign_budget_operation.create
+    budget.resource_name = budget_resource
+    fill_budget(budget)
+
+    campaign_op = client.get_type('MutateOperation')
+    campaign = campaign_op.campaign_operation.create
+    campaign.resource_name = campaign_resource
+    fill_campaign(campaign, budget_resource)
 
-    campaign_resource = response.results[0].resource_name
+    geo_op = client.get_type('MutateOperation')
+    fill_geo_criterion(geo_op.campaign_criterion_operation.create, campaign_resource)
+
+    lang_op = client.get_type('MutateOperation')
+    fill_language_criterion(lang_op.campaign_criterion_operation.create, campaign_resource)
+
+    ad_group_op = client.get_type('MutateOperation')
+    ad_group = ad_group_op.ad_group_operation.create
+    ad_group.resource_name = ad_group_resource
+    fill_ad_group(ad_group, campaign_resource)
+
+    ad_op = client.get_type('MutateOperation')
+    fill_app_ad(ad_op.ad_group_ad_operation.create, ad_group_resource)
+
+    return [budget_op, campaign_op, geo_op, lang_op, ad_group_op, ad_op]
+
+
+def provision_atomic():
+    """Steps 1-5 in a single all-or-nothing mutate; returns the created resource names."""
+    print("\n=== Steps 1-5: Creating Budget, Campaign, Targeting, Ad Group and App Ad (atomic) ===")
+
+    def mutate(operations):
+        response = get_service('GoogleAdsService').mutate(customer_id=CUSTOMER_ID, mutate_operations=operations)
+        created = {}
+        for result in response.mutate_operation_responses:
+            kind = result._pb.WhichOneof('response')
+            created.setdefault(kind, []).append(getattr(result, kind).resource_name)
+        return created
+
+    created = journal.run('graph', build_mutate_operations(), mutate)
+    for kind, resources in created.items():
+        for resource in resources:
+            print(f"  {kind.replace('_result', '')}: {resource}")
+    return created
+
+
+# === Step-by-step mode: one call per step ===
+
+def create_budget():
+    """Step 1: Create campaign budget - R$10/day"""
+    client = get_client()
+    print("\n=== Step 1: Creating Campaign Budget ===")
+
+    budget_service = get_service('CampaignBudgetService')
+    budget_operation = client.get_type('CampaignBudgetOperation')
+    fill_budget(budget_operation.create)
+
+    budget_resource, = journal.run('budget', [budget_operation], lambda operations: resource_names(
+        budget_service.mutate_campaign_budgets(customer_id=CUSTOMER_ID, operations=operations)
+    ))
+    print(f"  Budget created: {budget_resource}")
+    return budget_resource
+
+
+def create_campaign(budget_resource):
+    """Step 2: Create campaign (PAUSED) with App Campaign settings"""
+    client = get_client()
+    print("\n=== Step 2: Creating Campaign (PAUSED) ===")
+
+    campaign_service = get_service('CampaignService')
+    campaign_operation = client.get_type('CampaignOperation')
+    fill_campaign(campaign_operation.create, budget_resource)
+
+    campaign_resource, = journal.run('campaign', [campaign_operation], lambda operations: resource_names(
+        campaign_service.mutate_campaigns(customer_id=CUSTOMER_ID, operations=operations)
+    ))
     print(f"  Campaign created: {campaign_resource}")
     return campaign_resource
 
 
 def create_targeting(campaign_resource):
     """Step 3: Configure geo (Brazil) and language (Portuguese) targeting"""
+    client = get_client()
     print("\n=== Step 3: Configuring Targeting ===")
 
-    criterion_service = client.get_service('CampaignCriterionService')
+    criterion_service = get_service('CampaignCriterionService')
 
-    # Geo targeting - Brazil
     geo_operation = client.get_type('CampaignCriterionOperation')
-    geo_criterion = geo_operation.create
-    geo_criterion.campaign = campaign_resource
-    geo_criterion.location.geo_target_constant = client.get_service(
-        'GeoTargetConstantService'
-    ).geo_target_constant_path(2076)
+    fill_geo_criterion(geo_operation.create, campaign_resource)
 
-    # Language targeting - Portuguese
     lang_operation = client.get_type('CampaignCriterionOperation')
-    lang_criterion = lang_operation.create
-    lang_criterion.campaign = campaign_resource
-    lang_criterion.language.language_constant = client.get_service(
-        'GoogleAdsService'
-    ).language_constant_path(1014)
-
-    response = criterion_service.mutate_campaign_criteria(
-        customer_id=CUSTOMER_ID,
-        operations=[geo_operation, lang_operation]
-    )
+    fill_language_criterion(lang_operation.create, campaign_resource)
 
-    for result in response.results:
-        print(f"  Criterion created: {result.resource_name}")
+    criteria = journal.run('targeting', [geo_operation, lang_operation], lambda operations: resource_names(
+        criterion_service.mutate_campaign_criteria(customer_id=CUSTOMER_ID, operations=operations)
+    ))
+
+    for criterion in criteria:
+        print(f"  Criterion created: {criterion}")
 
     return True
 
 
 def create_ad_group(campaign_resource):
     """Step 4: Create ad group"""
+    client = get_client()
     print("\n=== Step 4: Creating Ad Group ===")
 
-    ad_group_service = client.get_service('AdGroupService')
+    ad_group_service = get_service('AdGroupService')
     ad_group_operation = client.get_type('AdGroupOperation')
+    fill_ad_group(ad_group_operation.create, campaign_resource)
 
-    ad_group = ad_group_operation.create
-    ad_group.name = 'Ad group 1'
-    ad_group.campaign = campaign_resource
-    ad_group.status = client.enums.AdGroupStatusEnum.ENABLED
-
-    response = ad_group_service.mutate_ad_groups(
-        customer_id=CUSTOMER_ID,
-        operations=[ad_group_operation]
-    )
-
-    ad_group_resource = response.results[0].resource_name
+    ad_group_resource, = journal.run('ad_group', [ad_group_operation], lambda operations: resource_names(
+        ad_group_service.mutate_ad_groups(customer_id=CUSTOMER_ID, operations=operations)
+    ))
     print(f"  Ad group created: {ad_group_resource}")
     return ad_group_resource
 
 
 def create_app_ad(ad_group_resource):
     """Step 5: Create App Ad with headlines and descriptions"""
+    client = get_client()
     print("\n=== Step 5: Creating App Ad ===")
 
-    ad_group_ad_service = client.get_service('AdGroupAdService')
+    ad_group_ad_service = get_service('AdGroupAdService')
     ad_group_ad_operation = client.get_type('AdGroupAdOperation')
+    fill_app_ad(ad_group_ad_operation.create, ad_group_resource)
 
-    ad_group_ad = ad_group_ad_operation.create
-    ad_group_ad.ad_group = ad_group_resource
-    ad_group_ad.status = client.enums.AdGroupAdStatusEnum.ENABLED
-
-    # Headlines (max 5 for app ads, 30 chars each)
-    headlines = [
-        'Ordem de serviço no app',
-        'Controle sua assistência',
-        'OS, clientes e histórico',
-        'Checklist e fotos na OS',
-        'App para assistência técnica',
-    ]
-
-    for headline_text in headlines:
-        headline = client.get_type('AdTextAsset')
-        headline.text = headline_text
-        ad_group_ad.ad.app_ad.headlines.append(headline)
-
-    # Descriptions (max 5, 90 chars each)
-    descriptions = [
-        'Crie OS, registre serviços e acompanhe o status. Organização na rotina.',
-        'Clientes, aparelhos e histórico em um só lugar. Simples e rápido.',
-        'Faça orçamento, registre fotos e finalize serviços com agilidade.',
-        'Organize entradas e saídas e evite retrabalho. Baixe e teste grátis.',
-        'Funciona offline e facilita o atendimento. Gestão prática no dia a dia.',
-    ]
-
-    for desc_text in descriptions:
-        desc = client.get_type('AdTextAsset')
-        desc.text = desc_text
-        ad_group_ad.ad.app_ad.descriptions.append(desc)
-
-    response = ad_group_ad_service.mutate_ad_group_ads(
-        customer_id=CUSTOMER_ID,
-        operations=[ad_group_ad_operation]
-    )
-
-    ad_resource = response.results[0].resource_name
+    ad_resource, = journal.run('app_ad', [ad_group_ad_operation], lambda operations: resource_names(
+        ad_group_ad_service.mutate_ad_group_ads(customer_id=CUSTOMER_ID, operations=operations)
+    ))
     print(f"  App Ad created: {ad_resource}")
     return ad_resource
 
 
-def verify_campaign():
-    """Step 6: Verify all created resources"""
-    print("\n=== Step 6: Verifying Campaign ===")
-
-    # Query campaign details
-    query = '''
+# Verification queries, run concurrently with search_stream. Each selects
+# campaign.id so rows can be grouped per campaign; {ids} is the ID list.
+VERIFY_QUERIES = {
+    'campaign': '''
         SELECT
             campaign.id,
             campaign.name,
@@ -212,85 +467,135 @@ def verify_campaign():
             campaign.app_campaign_setting.bidding_strategy_goal_type,
             campaign_budget.amount_micros
         FROM campaign
-        WHERE campaign.name = 'App-iOS'
-    '''
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-    for row in response:
-        budget = row.campaign_budget.amount_micros / 1_000_000
-        print(f"\n  Campaign: {row.campaign.name}")
-        print(f"  ID: {row.campaign.id}")
-        print(f"  Status: {row.campaign.status.name}")
-        print(f"  Channel: {row.campaign.advertising_channel_type.name}")
-        print(f"  Sub-channel: {row.campaign.advertising_channel_sub_type.name}")
-        print(f"  App ID: {row.campaign.app_campaign_setting.app_id}")
-        print(f"  App Store: {row.campaign.app_campaign_setting.app_store.name}")
-        print(f"  Bidding Goal: {row.campaign.app_campaign_setting.bidding_strategy_goal_type.name}")
-        print(f"  Budget: R${budget:.2f}/day")
-        campaign_id = row.campaign.id
-
-    # Query targeting
-    query2 = f'''
+        WHERE campaign.id IN ({ids})
+    ''',
+    'targeting': '''
         SELECT
-            campaign_criterion.criterion_id,
+            campaign.id,
             campaign_criterion.type,
             campaign_criterion.location.geo_target_constant,
             campaign_criterion.language.language_constant
         FROM campaign_criterion
-        WHERE campaign.name = 'App-iOS'
-    '''
-    response2 = ga_service.search(customer_id=CUSTOMER_ID, query=query2)
-    print("\n  Targeting:")
-    for row in response2:
-        ctype = row.campaign_criterion.type_.name
-        if ctype == 'LOCATION':
-            print(f"    Location: {row.campaign_criterion.location.geo_target_constant}")
-        elif ctype == 'LANGUAGE':
-            print(f"    Language: {row.campaign_criterion.language.language_constant}")
-
-    # Query ad group
-    query3 = f'''
+        WHERE campaign.id IN ({ids})
+            AND campaign_criterion.type IN ('LOCATION', 'LANGUAGE')
+    ''',
+    'ad_groups': '''
         SELECT
+            campaign.id,
             ad_group.id,
             ad_group.name,
             ad_group.status
         FROM ad_group
-        WHERE campaign.name = 'App-iOS'
-    '''
-    response3 = ga_service.search(customer_id=CUSTOMER_ID, query=query3)
-    print("\n  Ad Groups:")
-    for row in response3:
-        print(f"    {row.ad_group.name} (ID: {row.ad_group.id}) - {row.ad_group.status.name}")
-
-    # Query ads
-    query4 = f'''
+        WHERE campaign.id IN ({ids})
+    ''',
+    'ads': '''
         SELECT
+            campaign.id,
             ad_group_ad.ad.id,
             ad_group_ad.ad.type,
             ad_group_ad.status,
             ad_group_ad.ad.app_ad.headlines,
             ad_group_ad.ad.app_ad.descriptions
         FROM ad_group_ad
-        WHERE campaign.name = 'App-iOS'
-    '''
-    response4 = ga_service.search(customer_id=CUSTOMER_ID, query=query4)
-    print("\n  Ads:")
-    for row in response4:
-        print(f"    Ad ID: {row.ad_group_ad.ad.id} - Type: {row.ad_group_ad.ad.type_.name} - Status: {row.ad_group_ad.status.name}")
-        print(f"    Headlines: {[h.text for h in row.ad_group_ad.ad.app_ad.headlines]}")
-        print(f"    Descriptions: {[d.text for d in row.ad_group_ad.ad.app_ad.descriptions]}")
+        WHERE campaign.id IN ({ids})
+    ''',
+}
+
+
+def campaign_id_from(resource_name):
+    """customers/<customer>/campaigns/<id> -> <id>"""
+    return resource_name.rsplit('/', 1)[-1]
+
+
+def _stream_rows(ga_service, query):
+    rows = []
+    for batch in ga_service.search_stream(customer_id=CUSTOMER_ID, query=query):
+        rows.extend(batch.results)
+    return rows
+
+
+def verify_campaigns(campaign_ids):
+    """Step 6: Verify the created resources of one or more campaigns by ID.
 
-    return campaign_id
+    The four queries stream concurrently and the results are printed as one
+    report per campaign. Returns {campaign_id: report}; campaigns that were
+    not found are left out.
+    """
+    print("\n=== Step 6: Verifying Campaign ===")
+
+    ids = ', '.join(str(int(campaign_id)) for campaign_id in campaign_ids)
+    # Fetched before the threads start: get_client's cache has no lock, so
+    # concurrent first calls could each load their own client.
+    ga_service = get_service('GoogleAdsService')
+    with ThreadPoolExecutor(max_workers=len(VERIFY_QUERIES)) as pool:
+        futures = {
+            name: pool.submit(_stream_rows, ga_service, query.format(ids=ids))
+            for name, query in VERIFY_QUERIES.items()
+        }
+        rows = {name: future.result() for name, future in futures.items()}
+
+    reports = {}
+    for row in rows['campaign']:
+        reports[row.campaign.id] = {
+            'campaign': row.campaign,
+            'budget': row.campaign_budget.amount_micros / 1_000_000,
+            'targeting': [],
+            'ad_groups': [],
+            'ads': [],
+        }
+    for name in ('targeting', 'ad_groups', 'ads'):
+        for row in rows[name]:
+            if row.campaign.id in reports:
+                reports[row.campaign.id][name].append(row)
+
+    for campaign_id in campaign_ids:
+        report = reports.get(int(campaign_id))
+        if report is None:
+            print(f"\n  Campaign {campaign_id}: NOT FOUND")
+            continue
+        campaign = report['campaign']
+        print(f"\n  Campaign: {campaign.name}")
+        print(f"  ID: {campaign.id}")
+        print(f"  Status: {campaign.status.name}")
+        print(f"  Channel: {campaign.advertising_channel_type.name}")
+        print(f"  Sub-channel: {campaign.advertising_channel_sub_type.name}")
+        print(f"  App ID: {campaign.app_campaign_setting.app_id}")
+        print(f"  App Store: {campaign.app_campaign_setting.app_store.name}")
+        print(f"  Bidding Goal: {campaign.app_campaign_setting.bidding_strategy_goal_type.name}")
+        print(f"  Budget: R${report['budget']:.2f}/day")
+
+        print("\n  Targeting:")
+        for row in report['targeting']:
+            ctype = row.campaign_criterion.type_.name
+            if ctype == 'LOCATION':
+                print(f"    Location: {row.campaign_criterion.location.geo_target_constant}")
+            elif ctype == 'LANGUAGE':
+                print(f"    Language: {row.campaign_criterion.language.language_constant}")
+
+        print("\n  Ad Groups:")
+        for row in report['ad_groups']:
+            print(f"    {row.ad_group.name} (ID: {row.ad_group.id}) - {row.ad_group.status.name}")
+
+        print("\n  Ads:")
+        for row in report['ads']:
+            ad = row.ad_group_ad.ad
+            print(f"    Ad ID: {ad.id} - Type: {ad.type_.name} - Status: {row.ad_group_ad.status.name}")
+            print(f"    Headlines: {[h.text for h in ad.app_ad.headlines]}")
+            print(f"    Descriptions: {[d.text for d in ad.app_ad.descriptions]}")
+
+    return reports
 
 
 def enable_campaign(campaign_id):
     """Step 7: Activate the campaign"""
+    client = get_client()
     print("\n=== Step 7: Activating Campaign ===")
 
-    campaign_service = client.get_service('CampaignService')
+    campaign_service = get_service('CampaignService')
     campaign_operation = client.get_type('CampaignOperation')
 
     campaign = campaign_operation.update
-    campaign.resource_name = client.get_service('CampaignService').campaign_path(
+    campaign.resource_name = get_service('CampaignService').campaign_path(
         CUSTOMER_ID, campaign_id
     )
     campaign.status = client.enums.CampaignStatusEnum.ENABLED
@@ -299,38 +604,96 @@ def enable_campaign(campaign_id):
     from google.protobuf import field_mask_pb2
     campaign_operation.update_mask = field_mask_pb2.FieldMask(paths=['status'])
 
-    response = campaign_service.mutate_campaigns(
-        customer_id=CUSTOMER_ID,
-        operations=[campaign_operation]
-    )
+    campaign_resource, = journal.run('enable', [campaign_operation], lambda operations: resource_names(
+        campaign_service.mutate_campaigns(customer_id=CUSTOMER_ID, operations=operations)
+    ))
 
-    print(f"  Campaign activated: {response.results[0].resource_name}")
+    print(f"  Campaign activated: {campaign_resource}")
     return True
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--step-by-step", action="store_true",
+        help="Create each resource with its own call instead of one atomic mutate",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Print the operation plan and exit (no credentials or google.ads import needed)",
+    )
+    parser.add_argument(
+        "--customer-id", default=CUSTOMER_ID,
+        help=f"Google Ads customer ID (default: $GOOGLE_ADS_CUSTOMER_ID or {CUSTOMER_ID})",
+    )
+    parser.add_argument(
+        "--config", default=CONFIG_PATH,
+        help=f"google-ads.yaml path (default: $GOOGLE_ADS_CONFIGURATION_FILE_PATH or {CONFIG_PATH})",
+    )
+    parser.add_argument(
+        "--journal", default=JOURNAL_PATH,
+        help=f"Journal of the steps done, for resuming (default: {JOURNAL_PATH})",
+    )
+    parser.add_argument("--no-journal", action="store_true", help="Don't read or write the journal")
+    parser.add_argument(
+        "--verify", nargs="+", type=int, metavar="CAMPAIGN_ID",
+        help="Only verify existing campaigns by ID (one report for all of them)",
+    )
+    return parser.parse_args()
+
+
+STEP_BY_STEP = ['budget', 'campaign', 'targeting', 'ad_group', 'app_ad']
+
+
 def main():
+    global journal, CUSTOMER_ID, CONFIG_PATH
+    args = parse_args()
+    CUSTOMER_ID, CONFIG_PATH = args.customer_id, args.config
+    journal = Journal(None if args.no_journal else args.journal, CUSTOMER_ID)
+    if args.dry_run:
+        print_plan(args.step_by_step)
+        return
+
+    if args.verify:
+        # Report on existing campaigns only
+        reports = verify_campaigns(args.verify)
+        sys.exit(0 if len(reports) == len(set(args.verify)) else 1)
+
     print("=" * 60)
     print("  Google Ads - Creating App-iOS Campaign")
     print("=" * 60)
 
+    # The two modes create the same resources under different journal steps
+    other = ['graph'] if args.step_by_step else STEP_BY_STEP
+    if any(step in journal.steps for step in other):
+        mode = 'without' if args.step_by_step else 'with'
+        print(f"\n  ERROR: {args.journal} has a run in the other mode; resume it {mode} --step-by-step")
+        sys.exit(1)
+
     try:
-        # Step 1: Budget
-        budget_resource = create_budget()
+        if args.step_by_step:
+            # Step 1: Budget
+            budget_resource = create_budget()
 
-        # Step 2: Campaign (PAUSED)
-        campaign_resource = create_campaign(budget_resource)
+            # Step 2: Campaign (PAUSED)
+            campaign_resource = create_campaign(budget_resource)
 
-        # Step 3: Targeting
-        create_targeting(campaign_resource)
+            # Step 3: Targeting
+            create_targeting(campaign_resource)
 
-        # Step 4: Ad Group
-        ad_group_resource = create_ad_group(campaign_resource)
+            # Step 4: Ad Group
+            ad_group_resource = create_ad_group(campaign_resource)
 
-        # Step 5: App Ad
-        create_app_ad(ad_group_resource)
+            # Step 5: App Ad
+            create_app_ad(ad_group_resource)
+        else:
+            # Steps 1-5 in one call; a failure rolls back all of them
+            campaign_resource = provision_atomic()['campaign_result'][0]
 
-        # Step 6: Verify
-        campaign_id = verify_campaign()
+        # Step 6: Verify (by the ID just created, not by name)
+        campaign_id = campaign_id_from(campaign_resource)
+        if int(campaign_id) not in verify_campaigns([campaign_id]):
+            raise RuntimeError(f"Campaign {campaign_id} was created but not found")
 
         # Step 7: Activate
         enable_campaign(campaign_id)
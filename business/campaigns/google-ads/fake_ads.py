@@ -0,0 +1,227 @@
+"""
+In-memory fake of the Google Ads services used by bulk_provision_campaigns.py
+
+FakeGoogleAdsClient mimics the parts of GoogleAdsClient the provisioner
+touches (get_service, get_type, enums, copy_from) and runs batch jobs
+locally: operations execute in order, temporary resource names resolve to
+the IDs created earlier in the same job, and the checks the API would make
+(positive budget, text lengths, unique campaign names, existing
+references) fail the offending operation. Every service call is counted in
+.calls, so a run shows how many round trips the real API would take.
+
+Usage:
+    python3 business/campaigns/google-ads/bulk_provision_campaigns.py \\
+        business/campaigns/google-ads/campaigns.example.csv --fake
+"""
+
+import itertools
+import threading
+import time
+
+MAX_HEADLINE_CHARS = 30
+MAX_DESCRIPTION_CHARS = 90
+
+# MutateOperation field -> (MutateOperationResponse field, resource collection)
+OPERATION_KINDS = {
+    'campaign_budget_operation': ('campaign_budget_result', 'campaignBudgets'),
+    'campaign_operation': ('campaign_result', 'campaigns'),
+    'campaign_criterion_operation': ('campaign_criterion_result', 'campaignCriteria'),
+    'ad_group_operation': ('ad_group_result', 'adGroups'),
+    'ad_group_ad_operation': ('ad_group_ad_result', 'adGroupAds'),
+}
+
+
+class Message:
+    """A protobuf-ish message: unknown fields are created on first access."""
+
+    def __init__(self, **fields):
+        self.__dict__['_fields'] = dict(fields)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._fields.setdefault(name, Message())
+
+    def __setattr__(self, name, value):
+        self._fields[name] = value
+
+    def __bool__(self):
+        return bool(self._fields)
+
+    def set_fields(self):
+        return list(self._fields)
+
+
+class _Enum:
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return name
+
+
+class _Enums:
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _Enum()
+
+
+class _Operation:
+    """Stands in for the long-running operation returned by RunBatchJob."""
+
+    def __init__(self, latency):
+        self._latency = latency
+
+    def result(self, timeout=None):
+        time.sleep(self._latency)
+
+
+class FakeGoogleAdsClient:
+    def __init__(self, latency=0.05, existing_campaigns=()):
+        self.enums = _Enums()
+        self.calls = 0
+        self.latency = latency
+        self.campaign_names = set(existing_campaigns)
+        self.resources = {}
+        self._jobs = {}
+        self._ids = itertools.count(1_000_000)
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def get_service(self, name):
+        if name == 'BatchJobService':
+            return _BatchJobService(self)
+        return _PathService()
+
+    def get_type(self, name):
+        if name == 'MutateOperation':
+            return _MutateOperation()
+        return Message()
+
+    def copy_from(self, destination, source):
+        destination._fields.update(source._fields)
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _new_id(self):
+        with self._lock:
+            return next(self._ids)
+
+
+class _MutateOperation(Message):
+    """A MutateOperation: a oneof of the per-resource operations."""
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._fields:
+            operation = Message()
+            if name == 'ad_group_ad_operation':
+                # Repeated fields the provisioner appends to
+                operation.create.ad.app_ad.headlines = []
+                operation.create.ad.app_ad.descriptions = []
+            self._fields[name] = operation
+        return self._fields[name]
+
+
+class _PathService:
+    """Resource path helpers shared by every service."""
+
+    def campaign_budget_path(self, customer_id, budget_id):
+        return f"customers/{customer_id}/campaignBudgets/{budget_id}"
+
+    def campaign_path(self, customer_id, campaign_id):
+        return f"customers/{customer_id}/campaigns/{campaign_id}"
+
+    def ad_group_path(self, customer_id, ad_group_id):
+        return f"customers/{customer_id}/adGroups/{ad_group_id}"
+
+    def geo_target_constant_path(self, geo_id):
+        return f"geoTargetConstants/{geo_id}"
+
+    def language_constant_path(self, language_id):
+        return f"languageConstants/{language_id}"
+
+
+class _BatchJobService:
+    def __init__(self, client):
+        self.client = client
+
+    def mutate_batch_job(self, customer_id, operation):
+        self.client._count()
+        job = f"customers/{customer_id}/batchJobs/{self.client._new_id()}"
+        self.client._jobs[job] = {'customer_id': customer_id, 'operations': [], 'results': None}
+        return Message(result=Message(resource_name=job))
+
+    def add_batch_job_operations(self, request):
+        self.client._count()
+        job = self.client._jobs[request['resource_name']]
+        job['operations'].extend(request['mutate_operations'])
+        return Message(next_sequence_token=f"token-{len(job['operations'])}")
+
+    def run_batch_job(self, resource_name):
+        self.client._count()
+        job = self.client._jobs[resource_name]
+        with self.client._run_lock:
+            job['results'] = _execute(self.client, job['customer_id'], job['operations'])
+        return _Operation(self.client.latency)
+
+    def list_batch_job_results(self, request):
+        self.client._count()
+        return iter(self.client._jobs[request['resource_name']]['results'])
+
+
+def _execute(client, customer_id, operations):
+    """Run a batch job's operations in order; returns the BatchJobResults."""
+    temp_names = {}
+    results = []
+    for index, mutate_operation in enumerate(operations):
+        kind = mutate_operation.set_fields()[0]
+        resource = getattr(mutate_operation, kind).create
+        result_field, collection = OPERATION_KINDS[kind]
+        try:
+            _resolve_references(resource, temp_names, client.resources)
+            _validate(client, kind, resource)
+        except ValueError as e:
+            results.append(Message(operation_index=index, status=Message(code=3, message=str(e))))
+            continue
+
+        name = f"customers/{customer_id}/{collection}/{client._new_id()}"
+        if resource._fields.get('resource_name'):
+            temp_names[resource.resource_name] = name
+        client.resources[name] = resource
+        if kind == 'campaign_operation':
+            client.campaign_names.add(resource.name)
+        response = Message(**{result_field: Message(resource_name=name)})
+        results.append(Message(operation_index=index, status=Message(code=0, message=''),
+                               mutate_operation_response=response))
+    return results
+
+
+def _resolve_references(resource, temp_names, resources):
+    for field in ('campaign_budget', 'campaign', 'ad_group'):
+        reference = resource._fields.get(field)
+        if not reference:
+            continue
+        if reference.split('/')[-1].startswith('-'):
+            if reference not in temp_names:
+                raise ValueError(f"RESOURCE_NOT_FOUND: {field} {reference}")
+            resource._fields[field] = temp_names[reference]
+        elif reference not in resources:
+            raise ValueError(f"RESOURCE_NOT_FOUND: {field} {reference}")
+
+
+def _validate(client, kind, resource):
+    if kind == 'campaign_budget_operation' and resource.amount_micros <= 0:
+        raise ValueError("NON_POSITIVE_AMOUNT: budget amount must be positive")
+    if kind == 'campaign_operation' and resource.name in client.campaign_names:
+        raise ValueError(f"DUPLICATE_CAMPAIGN_NAME: {resource.name}")
+    if kind == 'ad_group_ad_operation':
+        for asset in resource.ad.app_ad.headlines:
+            if len(asset.text) > MAX_HEADLINE_CHARS:
+                raise ValueError(f"TOO_LONG: headline '{asset.text}'")
+        for asset in resource.ad.app_ad.descriptions:
+            if len(asset.text) > MAX_DESCRIPTION_CHARS:
+                raise ValueError(f"TOO_LONG: description '{asset.text}'")
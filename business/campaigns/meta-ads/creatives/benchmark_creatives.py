@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Benchmark the creative rendering stages with synthetic inputs.
+
+Times each stage at the Feed (1080x1080) and Stories (1080x1920) sizes --
+gradients, drop shadows, phone mockups, full template renders and the GIF
+frame loader from docs/images/generate_gif.py -- and records the peak
+memory of a cold run. Inputs are generated on the fly, so the suite runs
+without the real screenshots; fonts resolve as in generate_creatives.py
+and are recorded with the baseline, since they change the timings.
+
+Results can be saved as a JSON baseline and later runs compared against it,
+to prove or reject an optimization with numbers.
+
+Usage:
+    python3 business/campaigns/meta-ads/creatives/benchmark_creatives.py
+    python3 business/campaigns/meta-ads/creatives/benchmark_creatives.py --save baseline.json
+    python3 business/campaigns/meta-ads/creatives/benchmark_creatives.py --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import PIL
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+import generate_creatives as gc
+
+sys.path.insert(0, os.path.join(gc.PROJECT_ROOT, "docs", "images"))
+import generate_gif  # noqa: E402
+
+SIZES = {"feed": (1080, 1080), "stories": (1080, 1920)}
+
+# Mockup sizes (before shadow) produced by the current templates
+SHADOW_CASES = [
+    ("whatsapp feed", (640, 850), 15, (6, 6)),
+    ("phone feed", (445, 950), 18, (6, 6)),
+    ("whatsapp stories", (1040, 1380), 18, (6, 8)),
+    ("phone stories", (632, 1350), 18, (6, 8)),
+]
+# Phone mockup heights used by the app templates
+MOCKUP_HEIGHTS = {"feed": 950, "stories": 1350}
+SCREENSHOT_SIZE = (1320, 2868)  # iPhone screenshot resolution
+GIF_FRAMES = 6
+REPEAT = 5
+THRESHOLD = 0.15  # relative slowdown reported as a regression
+
+
+# ===== Synthetic inputs =====
+
+def synthetic_mockup(size, radius=30):
+    """A rounded, opaque rectangle standing in for a screenshot mockup."""
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(img).rounded_rectangle(
+        [(0, 0), (size[0] - 1, size[1] - 1)], radius=radius, fill=(230, 230, 235, 255)
+    )
+    return img
+
+
+def synthetic_screenshot(size=SCREENSHOT_SIZE, seed=0):
+    """A chat-like screenshot: flat bubbles plus a noisy "photo" block."""
+    rng = random.Random(seed)
+    img = Image.new("RGBA", size, (236, 229, 221, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([(0, 0), (size[0], 260)], fill=(7, 94, 84, 255))
+    y = 320
+    while y < size[1] - 300:
+        h = rng.randint(90, 260)
+        w = rng.randint(size[0] // 3, size[0] * 3 // 4)
+        x = 40 if rng.random() < 0.5 else size[0] - 40 - w
+        fill = (255, 255, 255, 255) if x == 40 else (220, 248, 198, 255)
+        draw.rounded_rectangle([(x, y), (x + w, y + h)], radius=24, fill=fill)
+        y += h + rng.randint(20, 60)
+    photo = Image.effect_noise((size[0] // 2, size[0] // 3), 64).convert("RGBA")
+    img.paste(photo, (size[0] // 4, size[1] // 3))
+    return img
+
+
+def synthetic_logo():
+    img = Image.new("RGBA", (600, 180), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle([(0, 0), (599, 179)], radius=36, fill=(20, 60, 140, 255))
+    draw.ellipse([(470, 40), (570, 140)], fill=(255, 140, 0, 255))
+    return img
+
+
+def synthetic_paths(directory):
+    """Template assets and the GIF frames directory inside a benchmark workdir."""
+    assets = {name: os.path.join(directory, f"{name}.png") for name in ("logo", "whatsapp", "app")}
+    return assets, os.path.join(directory, "gif")
+
+
+def write_synthetic_inputs(directory):
+    """Write the synthetic logo, screenshots and GIF frames into directory."""
+    assets, frames_dir = synthetic_paths(directory)
+    synthetic_logo().save(assets["logo"])
+    synthetic_screenshot(seed=0).save(assets["whatsapp"])
+    synthetic_screenshot(seed=1).save(assets["app"])
+    os.makedirs(frames_dir)
+    for i in range(GIF_FRAMES):
+        synthetic_screenshot(seed=10 + i).save(os.path.join(frames_dir, f"Captura de Tela {i:02d}.png"))
+
+
+# ===== Measurement =====
+
+def add_shadow_reference(img, offset=(8, 8), blur_radius=20, shadow_color=(0, 0, 0, 100)):
+    """The original add_shadow: full-resolution blur of a padded RGBA canvas."""
+    shadow_size = (
+        img.width + abs(offset[0]) + blur_radius * 2,
+        img.height + abs(offset[1]) + blur_radius * 2,
+    )
+    shadow = Image.new("RGBA", shadow_size, (0, 0, 0, 0))
+    shadow_layer = Image.new("RGBA", img.size, shadow_color)
+    shadow_layer.putalpha(img.split()[3])
+    shadow.paste(shadow_layer, (blur_radius + max(offset[0], 0), blur_radius + max(offset[1], 0)))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(blur_radius))
+    shadow.paste(img, (blur_radius + max(-offset[0], 0), blur_radius + max(-offset[1], 0)), img)
+    return shadow
+
+
+def timed(fn, repeat=REPEAT, setup=None):
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def _proc_rss_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def _reset_peak_rss():
+    """Reset the RSS high-water mark (Linux only); return whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _measure_child(conn, workdir, name):
+    fn, setup = build_cases(workdir)[name]
+    if setup:
+        setup()
+    # Reset the high-water mark where possible, so setup doesn't count
+    if _reset_peak_rss():
+        before = _proc_rss_mb("VmRSS")
+        fn()
+        peak = _proc_rss_mb("VmHWM")
+    else:
+        before = _max_rss_mb()
+        fn()
+        peak = _max_rss_mb()
+    conn.send(peak - before)
+    conn.close()
+
+
+def peak_memory(workdir, name):
+    """Peak RSS growth (MB) of one cold run of a stage, in a fresh process.
+
+    Pillow allocates image memory outside the Python heap, so tracemalloc
+    would miss it, and a forked child would reuse memory this process has
+    already touched; a spawned interpreter starts clean.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_measure_child, args=(sender, workdir, name))
+    proc.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        return float("nan")
+    finally:
+        proc.join()
+
+
+def quiet(fn):
+    """Run fn with stdout discarded (the generators print progress)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def clear_caches():
+    """Forget every decoded source and processed layer, for a cold run."""
+    gc._DECODED.clear()
+    gc._LAYERS.clear()
+    gc._cached_gradient.cache_clear()
+    gc.text_bbox.cache_clear()
+    gc.glyph_run.cache_clear()
+
+
+# ===== Stages =====
+
+def gradient_cases():
+    for name, (w, h) in SIZES.items():
+        yield (
+            f"create_gradient/{name}",
+            lambda w=w, h=h: gc.create_gradient(w, h, gc.GRADIENT_TOP, gc.GRADIENT_BOTTOM),
+            gc._cached_gradient.cache_clear,
+        )
+
+
+def shadow_cases():
+    for name, size, blur, offset in SHADOW_CASES:
+        img = synthetic_mockup(size)
+        kwargs = dict(offset=offset, blur_radius=blur, shadow_color=(0, 0, 0, 80))
+        yield f"add_shadow/{name}", lambda img=img, kwargs=kwargs: gc.add_shadow(img, **kwargs), gc._LAYERS.clear
+
+
+def mockup_cases(assets):
+    for name, height in MOCKUP_HEIGHTS.items():
+        yield (
+            f"create_phone_mockup/{name}",
+            lambda height=height: gc.create_phone_mockup(assets["app"], height),
+            clear_caches,
+        )
+
+
+def render_cases(assets, output_dir):
+    # What generate_whatsapp_feed()/generate_whatsapp_stories() do, on synthetic assets
+    for name in SIZES:
+        job = gc.apply_variant(gc.load_template(f"whatsapp_{name}"), {"assets": assets})
+        yield (
+            f"generate_whatsapp_{name}",
+            quiet(lambda job=job: gc.render_batch([job], output_dir, force=True)),
+            clear_caches,
+        )
+
+
+def gif_cases(frames_dir):
+    generate_gif.INPUT_DIR = frames_dir
+    for width in (generate_gif.OUTPUT_WIDTH, generate_gif.WEB_WIDTH):
+        yield f"load_frames/{width}px", quiet(lambda width=width: generate_gif.load_frames(width)), None
+
+    frames = []
+
+    def load_web_frames():
+        if not frames:
+            frames.extend(quiet(generate_gif.load_frames)(generate_gif.WEB_WIDTH))
+
+    output = os.path.join(frames_dir, "bench.gif")
+    yield (
+        f"save_gif/{generate_gif.WEB_WIDTH}px-{generate_gif.WEB_COLORS}c",
+        quiet(lambda: generate_gif.save_gif(frames, output, len(frames), generate_gif.WEB_COLORS)),
+        load_web_frames,
+    )
+
+
+def build_cases(workdir):
+    """Every stage as {name: (fn, setup)}, reading synthetic inputs from workdir."""
+    assets, frames_dir = synthetic_paths(workdir)
+    cases = [
+        *gradient_cases(),
+        *shadow_cases(),
+        *mockup_cases(assets),
+        *render_cases(assets, os.path.join(workdir, "out")),
+        *gif_cases(frames_dir),
+    ]
+    return {name: (fn, setup) for name, fn, setup in cases}
+
+
+def shadow_error(img, **kwargs):
+    """Largest per-channel difference between add_shadow and the reference."""
+    diff = ImageChops.difference(add_shadow_reference(img, **kwargs), gc.add_shadow(img, **kwargs))
+    return max(hi for _, hi in diff.getextrema())
+
+
+def bench_shadow():
+    """Compare the fast drop-shadow compositor with the original algorithm.
+
+    Returns the cases whose error exceeds gc.SHADOW_MAX_ERROR.
+    """
+    print("=== add_shadow vs reference ===")
+    over = []
+    print(f"  {'case':<18}{'size':>11}{'reference':>11}{'exact':>9}{'fast':>9}{'cached':>9}{'speedup':>9}{'max err':>9}")
+    for name, size, blur, offset in SHADOW_CASES:
+        img = synthetic_mockup(size)
+        kwargs = dict(offset=offset, blur_radius=blur, shadow_color=(0, 0, 0, 80))
+
+        reference = timed(lambda: add_shadow_reference(img, **kwargs))
+        exact = timed(lambda: gc.add_shadow(img, downscale=1, **kwargs), setup=gc._LAYERS.clear)
+        fast = timed(lambda: gc.add_shadow(img, **kwargs), setup=gc._LAYERS.clear)
+        cached = timed(lambda: gc.add_shadow(img, **kwargs))
+
+        max_err = shadow_error(img, **kwargs)
+        flag = ""
+        if max_err > gc.SHADOW_MAX_ERROR:
+            over.append(name)
+            flag = f"  OVER {gc.SHADOW_MAX_ERROR}"
+        print(
+            f"  {name:<18}{size[0]:>5}x{size[1]:<5}{reference:>9.1f}ms{exact:>7.1f}ms"
+            f"{fast:>7.1f}ms{cached:>7.1f}ms{reference / fast:>8.1f}x{max_err:>9}{flag}"
+        )
+    print()
+    return over
+
+
+def run_suite(repeat=REPEAT, only=None):
+    """Time every stage (cold, best of repeat) and measure its peak memory."""
+    tmp = tempfile.mkdtemp(prefix="creatives-bench-")
+    try:
+        write_synthetic_inputs(tmp)
+        results = {}
+        print(f"=== Stages (cold, best of {repeat}) ===")
+        print(f"  {'stage':<36}{'time':>10}{'peak mem':>12}")
+        for name, (fn, setup) in build_cases(tmp).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            ms = timed(fn, repeat, setup)
+            peak = peak_memory(tmp, name)
+            results[name] = {"ms": round(ms, 2), "peak_mb": round(peak, 1)}
+            print(f"  {name:<36}{ms:>8.1f}ms{peak:>9.1f} MB")
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ===== Baselines =====
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        # Renders (and so timings) depend on which fonts were found
+        "fonts": {style: gc.resolve_font(style) for style in gc.FONT_CANDIDATES},
+    }
+
+
+def save_baseline(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\nBaseline saved: {path}")
+
+
+def compare_baseline(path, results, threshold=THRESHOLD):
+    """Print the change of every stage against a saved baseline; return the regressions."""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    # Round-trip through JSON so tuples (the resolved fonts) compare as the lists they were saved as
+    if baseline.get("environment") != json.loads(json.dumps(environment())):
+        print(f"\n(note: baseline was recorded on {baseline.get('environment')})")
+
+    print(f"\n=== Compared with {path} (regression: >{threshold:.0%} slower) ===")
+    print(f"  {'stage':<36}{'baseline':>10}{'now':>10}{'change':>9}{'peak mem':>16}")
+    regressions = []
+    for name, now in results.items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"  {name:<36}{'-':>10}{now['ms']:>8.1f}ms{'new':>9}")
+            continue
+        change = now["ms"] / before["ms"] - 1 if before["ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"  {name:<36}{before['ms']:>8.1f}ms{now['ms']:>8.1f}ms{change:>+8.0%}"
+            f"{before['peak_mb']:>7.1f} -> {now['peak_mb']:<5.1f}MB{flag}"
+        )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help=f"Runs per stage (default: {REPEAT})")
+    parser.add_argument("--only", nargs="+", metavar="TEXT", help="Only run stages whose name contains TEXT")
+    parser.add_argument("--save", metavar="JSON", help="Save the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="Compare the results with a saved baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD,
+        help=f"Relative slowdown that counts as a regression (default: {THRESHOLD})",
+    )
+    parser.add_argument("--skip-reference", action="store_true", help="Skip the add_shadow reference comparison")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    shadow_over = []
+    if not args.skip_reference and not args.only:
+        shadow_over = bench_shadow()
+    results = run_suite(args.repeat, args.only)
+
+    if args.save:
+        save_baseline(args.save, results)
+    regressions = args.compare and compare_baseline(args.compare, results, args.threshold)
+    if shadow_over or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 """
 Generate optimized Meta Ads creatives for PraticOS campaign.
 
-Produces 4 images:
+Each creative is described by a JSON template in templates/:
   - whatsapp_feed_1080x1080.png   (Creative 2 - WhatsApp static, Feed)
   - whatsapp_stories_1080x1920.png (Creative 2 - WhatsApp static, Stories)
   - app_feed_1080x1080.png        (Creative 3 - App, Feed)
@@ -10,11 +10,46 @@ Produces 4 images:
 
 Usage:
     python3 business/campaigns/meta-ads/creatives/generate_creatives.py
+    python3 business/campaigns/meta-ads/creatives/generate_creatives.py \
+        --manifest ~/.cache/praticos/creatives-manifest.json
+    python3 business/campaigns/meta-ads/creatives/generate_creatives.py \
+        --templates whatsapp_feed app_feed --variants headlines.json
+    python3 business/campaigns/meta-ads/creatives/generate_creatives.py \
+        --matrix --jobs 4 --output-dir /tmp/creatives
+    python3 business/campaigns/meta-ads/creatives/generate_creatives.py \
+        --export png jpeg webp thumbs
+    python3 business/campaigns/meta-ads/creatives/generate_creatives.py \
+        --force --profile --profile-trace /tmp/creatives-trace.json
+
+Each creative is saved in every format of the --export presets (see
+image_export.py), encoded in parallel threads, with the size and encode
+time of each variant reported.
+
+Fonts resolve per style (bold, medium, regular, symbol) to fonts/<style>.ttf
+next to this script (or $CREATIVES_FONT_DIR), then the macOS system fonts,
+then Liberation/DejaVu on Linux.
+
+--profile prints the wall time, Pillow allocations and output bytes of each
+stage (decode, resize, blur, text, layer, composite, encode) per creative;
+--profile-trace writes the same as Chrome-trace JSON.
 """
 
+import argparse
+import copy
+import collections
+import functools
+import hashlib
+import itertools
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+import image_export
+import stage_profiler
+
 # --- Paths ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", ".."))
@@ -32,9 +67,28 @@ LOGO_PATH = os.path.join(
     "images", "logo.png"
 )
 
+SCREENSHOTS_DIR = os.path.join(
+    PROJECT_ROOT, "firebase", "hosting", "src", "assets", "screenshots"
+)
+
 OUTPUT_DIR = SCRIPT_DIR
+TEMPLATE_DIR = os.path.join(SCRIPT_DIR, "templates")
+# Localized copy: templates/locales/<locale>.json maps template -> layer overrides
+LOCALE_DIR = os.path.join(TEMPLATE_DIR, "locales")
+
+# Named sources that template layers refer to via "source"
+ASSETS = {
+    "logo": LOGO_PATH,
+    "whatsapp": WHATSAPP_SCREENSHOT,
+    "app": APP_SCREENSHOT,
+}
 
 # --- Fonts ---
+#
+# Logical styles resolve to the first installed candidate (path, face index):
+# fonts bundled in FONT_DIR ($CREATIVES_FONT_DIR, default fonts/ next to this
+# script, named <style>.ttf), then the macOS system fonts, then common Linux
+# packages. Pillow's built-in font is the last resort.
 FONT_PATH = "/System/Library/Fonts/HelveticaNeue.ttc"
 FONT_BOLD_INDEX = 1
 FONT_MEDIUM_INDEX = 10
@@ -43,6 +97,35 @@ FONT_REGULAR_INDEX = 0
 # SF NS has checkmarks and stars
 SFNS_PATH = "/System/Library/Fonts/SFNS.ttf"
 
+FONT_DIR = os.environ.get("CREATIVES_FONT_DIR", os.path.join(SCRIPT_DIR, "fonts"))
+_LINUX_FONTS = "/usr/share/fonts/truetype"
+FONT_CANDIDATES = {
+    "bold": [
+        (FONT_PATH, FONT_BOLD_INDEX),
+        (f"{_LINUX_FONTS}/liberation2/LiberationSans-Bold.ttf", 0),
+        (f"{_LINUX_FONTS}/liberation/LiberationSans-Bold.ttf", 0),
+        (f"{_LINUX_FONTS}/dejavu/DejaVuSans-Bold.ttf", 0),
+    ],
+    "medium": [
+        (FONT_PATH, FONT_MEDIUM_INDEX),
+        (f"{_LINUX_FONTS}/liberation2/LiberationSans-Regular.ttf", 0),
+        (f"{_LINUX_FONTS}/liberation/LiberationSans-Regular.ttf", 0),
+        (f"{_LINUX_FONTS}/dejavu/DejaVuSans.ttf", 0),
+    ],
+    "regular": [
+        (FONT_PATH, FONT_REGULAR_INDEX),
+        (f"{_LINUX_FONTS}/liberation2/LiberationSans-Regular.ttf", 0),
+        (f"{_LINUX_FONTS}/liberation/LiberationSans-Regular.ttf", 0),
+        (f"{_LINUX_FONTS}/dejavu/DejaVuSans.ttf", 0),
+    ],
+    # Needs ✓ and ★
+    "symbol": [
+        (SFNS_PATH, 0),
+        (f"{_LINUX_FONTS}/dejavu/DejaVuSans.ttf", 0),
+        (f"{_LINUX_FONTS}/noto/NotoSansSymbols2-Regular.ttf", 0),
+    ],
+}
+
 # --- Colors ---
 GRADIENT_TOP = (10, 30, 80)       # Deep navy blue
 GRADIENT_BOTTOM = (20, 60, 140)   # Medium blue
@@ -54,30 +137,149 @@ WHITE_60 = (255, 255, 255, 153)   # 60% opacity
 BADGE_BG = (255, 255, 255, 30)    # Semi-transparent white
 
 
-def create_gradient(width, height, top_color, bottom_color):
-    """Create a vertical gradient background."""
-    img = Image.new("RGB", (width, height))
-    for y in range(height):
-        ratio = y / height
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * ratio)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * ratio)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * ratio)
-        for x in range(width):
-            img.putpixel((x, y), (r, g, b))
-    return img
-
-
-def create_gradient_fast(width, height, top_color, bottom_color):
-    """Create a vertical gradient background (fast version using lines)."""
-    img = Image.new("RGB", (width, height))
-    draw = ImageDraw.Draw(img)
-    for y in range(height):
-        ratio = y / height
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * ratio)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * ratio)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * ratio)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-    return img
+def _gradient_stops(stops):
+    """Normalize gradient stops to a tuple of (position, (r, g, b)).
+
+    Accepts either plain colors (evenly spaced) or explicit (position, color)
+    pairs with positions in [0, 1].
+    """
+    stops = tuple(stops)
+    if len(stops) < 2:
+        raise ValueError("A gradient needs at least two color stops")
+    positioned = [len(s) == 2 and isinstance(s[1], (tuple, list)) for s in stops]
+    if all(positioned):
+        result = tuple((float(pos), tuple(color)) for pos, color in stops)
+        colors = [color for _, color in result]
+        positions = [pos for pos, _ in result]
+        if positions != sorted(positions) or not 0 <= positions[0] <= positions[-1] <= 1:
+            raise ValueError(f"Gradient stop positions must rise from 0 to 1, got {positions}")
+    elif any(positioned):
+        raise ValueError("Gradient stops mix plain colors with (position, color) pairs")
+    else:
+        last = len(stops) - 1
+        result = tuple((i / last, tuple(color)) for i, color in enumerate(stops))
+        colors = [color for _, color in result]
+    for color in colors:
+        if len(color) not in (3, 4) or not all(isinstance(c, int) for c in color):
+            raise ValueError(f"Gradient color must be (r, g, b), got {list(color)}")
+    return result
+
+
+def _template_stops(template):
+    """The template's normalized background stops; errors name the template."""
+    stops = template.get("background", {}).get("stops", (GRADIENT_TOP, GRADIENT_BOTTOM))
+    try:
+        return _gradient_stops(tuple(c) for c in stops)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Template {template['name']}: bad background stops: {e}") from None
+
+
+def _gradient_ramp(stops, length):
+    """Build `length` interpolated RGB values for normalized stops as raw bytes."""
+    ramp = bytearray()
+    seg = 0
+    for i in range(length):
+        t = i / length
+        while seg < len(stops) - 2 and t >= stops[seg + 1][0]:
+            seg += 1
+        (p0, c0), (p1, c1) = stops[seg], stops[seg + 1]
+        ratio = 0.0 if p1 == p0 else min(max((t - p0) / (p1 - p0), 0.0), 1.0)
+        ramp.extend(int(c0[k] + (c1[k] - c0[k]) * ratio) for k in range(3))
+    return bytes(ramp)
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_gradient(width, height, stops, direction):
+    if direction == "vertical":
+        strip = Image.frombytes("RGB", (1, height), _gradient_ramp(stops, height))
+        return strip.resize((width, height), Image.NEAREST)
+    if direction == "horizontal":
+        strip = Image.frombytes("RGB", (width, 1), _gradient_ramp(stops, width))
+        return strip.resize((width, height), Image.NEAREST)
+    if direction == "radial":
+        # radial_gradient() is 256x256 with 0 at the center, rising with the
+        # distance to reach ~180 at the edge midpoints and 255 only at the
+        # corners; use it as palette indices into a 256-color ramp.
+        index = Image.radial_gradient("L").resize((width, height), Image.BILINEAR)
+        img = index.convert("P")
+        img.putpalette(_gradient_ramp(stops, 256))
+        return img.convert("RGB")
+    raise ValueError(f"Unknown gradient direction: {direction}")
+
+
+def create_gradient(width, height, *stops, direction="vertical", mode="RGB"):
+    """Create a gradient background in a single pass.
+
+    `stops` are two or more colors (or (position, color) pairs); `direction`
+    is "vertical", "horizontal" or "radial". Results are cached by size and
+    stops, so callers get a fresh copy (in `mode`) they are free to draw on.
+    """
+    gradient = _cached_gradient(width, height, _gradient_stops(stops), direction)
+    return gradient.copy() if mode == "RGB" else gradient.convert(mode)
+
+
+@functools.lru_cache(maxsize=64)
+def get_font(path, size, index=0):
+    """Load a TrueType font once per process, keyed by (path, size, index).
+
+    Least recently used fonts are evicted once more than 64 are loaded.
+    """
+    return ImageFont.truetype(path, size, index=index)
+
+
+# Scratch surface for measuring multiline text without a target image
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+
+@functools.lru_cache(maxsize=2048)
+def text_bbox(font, text):
+    """Return the bounding box of text (multiline aware), cached per font."""
+    return _MEASURE_DRAW.textbbox((0, 0), text, font=font)
+
+
+def text_width(font, text):
+    bbox = text_bbox(font, text)
+    return bbox[2] - bbox[0]
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_font(style):
+    """Return the (path, index) a logical font style renders with, or None for Pillow's built-in font."""
+    bundled = [(os.path.join(FONT_DIR, f"{style}{ext}"), 0) for ext in (".ttf", ".otf")]
+    for path, index in bundled + FONT_CANDIDATES[style]:
+        if os.path.exists(path):
+            return path, index
+    return None
+
+
+def load_font(style, size):
+    """Load a font by logical style: bold, medium, regular or symbol (✓ and ★)."""
+    resolved = resolve_font(style)
+    if resolved is None:
+        return ImageFont.load_default(size)
+    return get_font(resolved[0], size, resolved[1])
+
+
+# Glyph runs (checkmarks, stars, badge and checklist strings) are rasterized
+# once per font into an L mask and stamped with their fill color, which
+# gives the same pixels as draw.text without rasterizing the glyphs again.
+
+@functools.lru_cache(maxsize=1024)
+def glyph_run(font, text):
+    """Rasterize a single line of text once; returns (mask, (left, top) offset)."""
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    return mask, (left, top)
+
+
+def draw_text_run(draw, position, text, font, fill):
+    """draw.text() for integer positions, stamped from the glyph-run cache when single-line."""
+    if "\n" in text:
+        draw.text(position, text, font=font, fill=fill)
+        return
+    mask, (left, top) = glyph_run(font, text)
+    draw.bitmap((position[0] + left, position[1] + top), mask, fill=fill)
 
 
 def add_rounded_corners(img, radius):
@@ -90,24 +292,59 @@ def add_rounded_corners(img, radius):
     return result
 
 
-def add_shadow(img, offset=(8, 8), blur_radius=20, shadow_color=(0, 0, 0, 100)):
-    """Add drop shadow to an RGBA image."""
+# Shadows are blurred at 1/SHADOW_DOWNSCALE resolution and scaled back up;
+# at 2x the result differs from a full-resolution blur by at most
+# SHADOW_MAX_ERROR/255 per channel (checked by benchmark_creatives.py).
+SHADOW_DOWNSCALE = 2
+SHADOW_MAX_ERROR = 5
+
+
+def _shadow_base(alpha, size, position, blur_radius, shadow_color, downscale):
+    """Blur just the alpha mask and tint it with the shadow color."""
+    with stage_profiler.stage("blur"):
+        return _blurred_shadow(alpha, size, position, blur_radius, shadow_color, downscale)
+
+
+def _blurred_shadow(alpha, size, position, blur_radius, shadow_color, downscale):
+    mask = Image.new("L", size, 0)
+    mask.paste(alpha, position)
+    if downscale > 1 and blur_radius >= downscale * 2:
+        small_size = (max(size[0] // downscale, 1), max(size[1] // downscale, 1))
+        small = mask.resize(small_size, Image.BOX)
+        small = small.filter(ImageFilter.GaussianBlur(blur_radius / downscale))
+        mask = small.resize(size, Image.BILINEAR)
+    else:
+        mask = mask.filter(ImageFilter.GaussianBlur(blur_radius))
+
+    # Like the shadow layer this replaces, opacity comes from the image alpha
+    shadow = Image.new("RGBA", size, tuple(shadow_color[:3]) + (0,))
+    shadow.putalpha(mask)
+    return shadow
+
+
+def add_shadow(img, offset=(8, 8), blur_radius=20, shadow_color=(0, 0, 0, 100), downscale=None):
+    """Add drop shadow to an RGBA image.
+
+    Only the alpha channel is blurred (at reduced resolution, see
+    SHADOW_DOWNSCALE), and the blurred shadow is cached by (mask hash, blur
+    radius, offset, color), so images sharing a silhouette reuse it.
+    """
+    if downscale is None:
+        downscale = SHADOW_DOWNSCALE
     shadow_size = (
         img.width + abs(offset[0]) + blur_radius * 2,
         img.height + abs(offset[1]) + blur_radius * 2,
     )
-    shadow = Image.new("RGBA", shadow_size, (0, 0, 0, 0))
-
-    # Create shadow from alpha channel
-    alpha = img.split()[3]
-    shadow_layer = Image.new("RGBA", img.size, shadow_color)
-    shadow_layer.putalpha(alpha)
-
-    shadow.paste(
-        shadow_layer,
-        (blur_radius + max(offset[0], 0), blur_radius + max(offset[1], 0)),
+    alpha = img.getchannel("A")
+    position = (blur_radius + max(offset[0], 0), blur_radius + max(offset[1], 0))
+    key = (
+        "shadow", hashlib.sha256(alpha.tobytes()).hexdigest(), img.size,
+        blur_radius, tuple(offset), tuple(shadow_color), downscale,
     )
-    shadow = shadow.filter(ImageFilter.GaussianBlur(blur_radius))
+    shadow = cached_layer(
+        key,
+        lambda: _shadow_base(alpha, shadow_size, position, blur_radius, shadow_color, downscale),
+    ).copy()
 
     # Paste original on top
     shadow.paste(
@@ -122,15 +359,15 @@ def draw_text_with_shadow(draw, position, text, font, fill=WHITE, shadow_offset=
     """Draw text with a subtle shadow for readability."""
     x, y = position
     # Shadow
-    draw.text((x + shadow_offset, y + shadow_offset), text, font=font, fill=(0, 0, 0, 120))
+    draw_text_run(draw, (x + shadow_offset, y + shadow_offset), text, font, (0, 0, 0, 120))
     # Main text
-    draw.text((x, y), text, font=font, fill=fill)
+    draw_text_run(draw, (x, y), text, font, fill)
 
 
 def draw_badge(draw, position, text, font, bg_color=(255, 255, 255, 25), text_color=WHITE, padding=(16, 8)):
     """Draw a pill-shaped badge with text."""
     x, y = position
-    bbox = font.getbbox(text)
+    bbox = text_bbox(font, text)
     text_w = bbox[2] - bbox[0]
     text_h = bbox[3] - bbox[1]
 
@@ -147,23 +384,22 @@ def draw_badge(draw, position, text, font, bg_color=(255, 255, 255, 25), text_co
     # Draw text centered
     text_x = x + (pill_w - text_w) // 2
     text_y = y + (pill_h - text_h) // 2
-    draw.text((text_x, text_y), text, font=font, fill=text_color)
+    draw_text_run(draw, (text_x, text_y), text, font, text_color)
 
     return pill_w, pill_h
 
 
 def draw_badge_with_star(draw, position, text, font, font_size, bg_color=(255, 255, 255, 25), text_color=WHITE, star_color=(255, 200, 50), padding=(16, 8)):
-    """Draw a badge with a proper star glyph using SFNS font."""
+    """Draw a badge with a proper star glyph from the symbol font."""
     x, y = position
-    # Use SFNS for star
-    sfns_font = ImageFont.truetype(SFNS_PATH, font_size)
+    symbol_font = load_font("symbol", font_size)
 
     # Split text around the star placeholder
     # Expected format: "4.8 STAR  ·  +10.000 OS criadas"
     star_char = "\u2605"
     parts = text.split(star_char)
 
-    bbox = font.getbbox(text)
+    bbox = text_bbox(font, text)
     text_w = bbox[2] - bbox[0]
     text_h = bbox[3] - bbox[1]
 
@@ -180,46 +416,127 @@ def draw_badge_with_star(draw, position, text, font, font_size, bg_color=(255, 2
         text_y = y + (pill_h - text_h) // 2
         # Draw first part
         cx = x + padding[0]
-        draw.text((cx, text_y), parts[0], font=font, fill=text_color)
-        cx += font.getbbox(parts[0])[2] - font.getbbox(parts[0])[0]
-        # Draw star with SFNS
-        draw.text((cx, text_y), star_char, font=sfns_font, fill=star_color)
-        cx += sfns_font.getbbox(star_char)[2] - sfns_font.getbbox(star_char)[0]
+        draw_text_run(draw, (cx, text_y), parts[0], font, text_color)
+        cx += text_width(font, parts[0])
+        # Draw star with the symbol font
+        draw_text_run(draw, (cx, text_y), star_char, symbol_font, star_color)
+        cx += text_width(symbol_font, star_char)
         # Draw rest
-        draw.text((cx, text_y), parts[1], font=font, fill=text_color)
+        draw_text_run(draw, (cx, text_y), parts[1], font, text_color)
     else:
         text_x = x + (pill_w - text_w) // 2
         text_y = y + (pill_h - text_h) // 2
-        draw.text((text_x, text_y), text, font=font, fill=text_color)
+        draw_text_run(draw, (text_x, text_y), text, font, text_color)
 
     return pill_w, pill_h
 
 
-def draw_check_item(draw, x, y, text, font, font_size, check_color=ACCENT_GREEN, text_color=WHITE_80):
-    """Draw a checkmark + text item using SFNS for the checkmark."""
-    sfns_font = ImageFont.truetype(SFNS_PATH, font_size)
-    draw.text((x, y), "\u2713", font=sfns_font, fill=check_color)
-    check_w = sfns_font.getbbox("\u2713")[2] - sfns_font.getbbox("\u2713")[0]
-    draw.text((x + check_w + 10, y), text, font=font, fill=text_color)
+def draw_check_item(draw, x, y, text, font, font_size, check_color=ACCENT_GREEN, text_color=WHITE_80, gap=10):
+    """Draw a checkmark + text item using the symbol font for the checkmark."""
+    symbol_font = load_font("symbol", font_size)
+    draw_text_run(draw, (x, y), "\u2713", symbol_font, check_color)
+    check_w = text_width(symbol_font, "\u2713")
+    draw_text_run(draw, (x + check_w + gap, y), text, font, text_color)
+
+
+# Decoded RGBA sources by path; worker processes are seeded from shared memory
+_DECODED = {}
+_SHARED_BLOCKS = []
+
+
+def load_image(path):
+    """Decode an image once per process as RGBA. Callers must not mutate it."""
+    if path not in _DECODED:
+        with stage_profiler.stage("decode"), Image.open(path) as img:
+            _DECODED[path] = img.convert("RGBA")
+    return _DECODED[path]
+
+
+# Processed layers (resized logo, rounded/shadowed mockups) keyed by content
+# hash + processing params. Memory tier is an LRU; the optional disk tier
+# (--asset-cache DIR) keeps them across runs as PNGs.
+LAYER_CACHE_SIZE = 32
+_LAYERS = collections.OrderedDict()
+_layer_cache_dir = None
+
+
+def set_layer_cache_dir(path):
+    """Enable (or disable with None) the on-disk processed-layer cache."""
+    global _layer_cache_dir
+    if path:
+        os.makedirs(path, exist_ok=True)
+    _layer_cache_dir = path
+
+
+@functools.lru_cache(maxsize=128)
+def _file_digest(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 
+def file_digest(path):
+    """SHA-256 of a file's contents, memoized while the file is unchanged."""
+    st = os.stat(path)
+    return _file_digest(path, st.st_mtime_ns, st.st_size)
 
-def load_logo(target_height):
+
+def cached_layer(key, build):
+    """Return the processed RGBA layer for key, building it only on a miss.
+
+    key must be a tuple of plain values that fully describes the layer (use
+    file_digest for sources). Callers must not mutate the returned image.
+    """
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    if digest in _LAYERS:
+        _LAYERS.move_to_end(digest)
+        return _LAYERS[digest]
+
+    disk_path = _layer_cache_dir and os.path.join(_layer_cache_dir, f"{digest}.png")
+    if disk_path and os.path.exists(disk_path):
+        with Image.open(disk_path) as img:
+            layer = img.convert("RGBA")
+    else:
+        layer = build()
+        if disk_path:
+            tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+            layer.save(tmp_path, "PNG", compress_level=1)
+            os.replace(tmp_path, disk_path)
+
+    _LAYERS[digest] = layer
+    if len(_LAYERS) > LAYER_CACHE_SIZE:
+        _LAYERS.popitem(last=False)
+    return layer
+
+
+def load_logo(target_height, path=LOGO_PATH):
     """Load and resize the PraticOS logo."""
-    logo = Image.open(LOGO_PATH).convert("RGBA")
-    ratio = target_height / logo.height
-    new_w = int(logo.width * ratio)
-    return logo.resize((new_w, target_height), Image.LANCZOS)
+    def build():
+        logo = load_image(path)
+        ratio = target_height / logo.height
+        new_w = int(logo.width * ratio)
+        with stage_profiler.stage("resize"):
+            return logo.resize((new_w, target_height), Image.LANCZOS)
+
+    return cached_layer(("logo", file_digest(path), target_height), build)
 
 
 def create_phone_mockup(screenshot_path, target_height, corner_radius=30):
     """Create a phone-like frame around a screenshot."""
-    screenshot = Image.open(screenshot_path).convert("RGBA")
+    return cached_layer(
+        ("phone", file_digest(screenshot_path), target_height, corner_radius),
+        lambda: _build_phone_mockup(screenshot_path, target_height, corner_radius),
+    )
+
+
+def _build_phone_mockup(screenshot_path, target_height, corner_radius):
+    screenshot = load_image(screenshot_path)
 
     # Scale screenshot to fit target height (with some padding for frame)
     inner_height = target_height - 20  # padding for frame
     ratio = inner_height / screenshot.height
     inner_width = int(screenshot.width * ratio)
-    screenshot = screenshot.resize((inner_width, inner_height), Image.LANCZOS)
+    with stage_profiler.stage("resize"):
+        screenshot = screenshot.resize((inner_width, inner_height), Image.LANCZOS)
 
     # Add rounded corners
     screenshot = add_rounded_corners(screenshot, corner_radius)
@@ -237,276 +554,641 @@ def create_phone_mockup(screenshot_path, target_height, corner_radius=30):
     return frame
 
 
-# ===== CREATIVE 2: WhatsApp Static =====
+# ===== Templates =====
+#
+# A template is a JSON file in templates/ describing a canvas and an ordered
+# list of layers (logo, headline, subtitle, checklist, badge, mockup). Layer
+# positions accept a number of pixels (negative counts from the far edge),
+# "center", or {"end": n} to align the layer's far edge n px past the canvas
+# edge (used for mockups that bleed off the right side).
+#
+# A variant is a dict of overrides applied on top of a template:
+#   {"name": "promo", "layers": {"headline": {"text": "..."}},
+#    "assets": {"app": "path/to/home.png"}}
+
+def load_template(name):
+    """Load a template by name (templates/<name>.json) or by path."""
+    path = name if name.endswith(".json") else os.path.join(TEMPLATE_DIR, f"{name}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_templates():
+    """Return the names of all templates in TEMPLATE_DIR."""
+    return sorted(
+        os.path.splitext(f)[0] for f in os.listdir(TEMPLATE_DIR) if f.endswith(".json")
+    )
 
-def generate_whatsapp_feed():
-    """Generate WhatsApp creative for Feed (1080x1080)."""
-    W, H = 1080, 1080
 
-    # Background gradient
-    bg = create_gradient_fast(W, H, GRADIENT_TOP, GRADIENT_BOTTOM)
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
+def apply_variant(template, variant):
+    """Return a copy of the template with the variant's overrides merged in."""
+    result = copy.deepcopy(template)
+    layers = {layer["id"]: layer for layer in result["layers"] if "id" in layer}
+    for layer_id, overrides in variant.get("layers", {}).items():
+        if layer_id not in layers:
+            raise KeyError(f"Template {template['name']} has no layer '{layer_id}'")
+        layers[layer_id].update(overrides)
+
+    result["assets"] = {**ASSETS, **template.get("assets", {}), **variant.get("assets", {})}
+    if "output" in variant:
+        result["output"] = variant["output"]
+    elif "name" in variant:
+        result["output"] = f"{variant['name']}_{template['output']}"
+    return result
 
-    # Fonts — bigger for impact
-    font_headline = ImageFont.truetype(FONT_PATH, 68, index=FONT_BOLD_INDEX)
-    font_sub = ImageFont.truetype(FONT_PATH, 30, index=FONT_MEDIUM_INDEX)
-    font_badge = ImageFont.truetype(FONT_PATH, 24, index=FONT_MEDIUM_INDEX)
 
-    # Logo (top left)
-    logo = load_logo(65)
-    overlay.paste(logo, (40, 35), logo)
+def _resolve(value, canvas, extent):
+    """Resolve a layer coordinate against the canvas and the layer extent."""
+    if value == "center":
+        return (canvas - extent) // 2
+    if isinstance(value, dict):
+        return canvas - extent + value["end"]
+    if value < 0:
+        return canvas + value
+    return value
+
+
+def _asset_path(template, source):
+    path = template["assets"].get(source, source)
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+# Layer renderers return the layer's bounding box on the canvas and a paint
+# function that draws the layer into a tile whose top-left corner sits at
+# (ox, oy). Drawing follows overlay semantics: pixels replace what is under
+# them in the overlay, and the overlay is composited over the background once.
+
+def _draw_logo(layer, template, size):
+    logo = load_logo(layer["height"], _asset_path(template, layer.get("source", "logo")))
+    x = _resolve(layer["x"], size[0], logo.width)
+    y = _resolve(layer["y"], size[1], logo.height)
+
+    def paint(tile, ox, oy):
+        tile.paste(logo, (x - ox, y - oy), logo)
+    return (x, y, x + logo.width, y + logo.height), paint
+
+
+def _draw_text(layer, template, size):
+    headline = layer["type"] == "headline"
+    font = load_font(layer.get("font", "bold" if headline else "medium"), layer["size"])
+    text = layer["text"]
+    bbox = text_bbox(font, text)
+    x = _resolve(layer["x"], size[0], bbox[2] - bbox[0])
+    y = _resolve(layer["y"], size[1], bbox[3] - bbox[1])
+    color = tuple(layer.get("color", WHITE if headline else WHITE_80))
+    shadow = layer.get("shadow", headline)
+    extra = 2 if shadow else 0  # draw_text_with_shadow's default offset
+
+    def paint(tile, ox, oy):
+        draw = ImageDraw.Draw(tile)
+        if shadow:
+            draw_text_with_shadow(draw, (x - ox, y - oy), text, font, color)
+        else:
+            draw_text_run(draw, (x - ox, y - oy), text, font, color)
+    return (x + bbox[0], y + bbox[1], x + bbox[2] + extra, y + bbox[3] + extra), paint
+
+
+def _draw_checklist(layer, template, size):
+    font_size = layer["size"]
+    font = load_font(layer.get("font", "medium"), font_size)
+    check_font = load_font("symbol", font_size)
+    check_w = text_width(check_font, "✓")
+    check_bbox = text_bbox(check_font, "✓")
+    gap = layer.get("gap", 10)
+
+    rows, boxes = [], []
+    y = _resolve(layer["y"], size[1], 0)
+    for item in layer["items"]:
+        x = _resolve(layer["x"], size[0], check_w + gap + text_width(font, item))
+        rows.append((x, y, item))
+        item_bbox = text_bbox(font, item)
+        text_x = x + check_w + gap
+        boxes.append((x + check_bbox[0], y + check_bbox[1], x + check_bbox[2], y + check_bbox[3]))
+        boxes.append((text_x + item_bbox[0], y + item_bbox[1], text_x + item_bbox[2], y + item_bbox[3]))
+        y += layer["spacing"]
+
+    def paint(tile, ox, oy):
+        draw = ImageDraw.Draw(tile)
+        for x, y, item in rows:
+            draw_check_item(draw, x - ox, y - oy, item, font, font_size=font_size, gap=gap)
+    return _union(boxes), paint
+
+
+def _draw_badge(layer, template, size):
+    font = load_font(layer.get("font", "medium"), layer["size"])
+    text = layer["text"]
+    bg_color = tuple(layer.get("color", (255, 255, 255, 35)))
+    bbox = text_bbox(font, text)
+    pill_w = bbox[2] - bbox[0] + 32
+    pill_h = bbox[3] - bbox[1] + 16
+    x = _resolve(layer["x"], size[0], pill_w)
+    y = _resolve(layer["y"], size[1], pill_h)
+
+    def paint(tile, ox, oy):
+        draw = ImageDraw.Draw(tile)
+        if "★" in text:
+            draw_badge_with_star(draw, (x - ox, y - oy), text, font, font_size=layer["size"], bg_color=bg_color)
+        else:
+            draw_badge(draw, (x - ox, y - oy), text, font, bg_color=bg_color)
+    # Generous margin: the star glyph comes from another font and may overhang
+    return (x - pill_h, y - pill_h, x + pill_w + pill_h, y + pill_h * 2), paint
+
+
+def _screenshot_mockup(path, layer):
+    """Crop, scale and round a raw screenshot (no phone frame)."""
+    img = load_image(path)
+    crop_top, crop_bottom = layer.get("crop", (0, 0))
+    if crop_top or crop_bottom:
+        img = img.crop((0, crop_top, img.width, img.height - crop_bottom))
+
+    target_h = layer["height"]
+    ratio = target_h / img.height
+    target_w = int(img.width * ratio)
+    max_w = layer.get("max_width")
+    if max_w and target_w > max_w:
+        target_w = max_w
+        ratio = target_w / img.width
+        target_h = int(img.height * ratio)
+
+    with stage_profiler.stage("resize"):
+        resized = img.resize((target_w, target_h), Image.LANCZOS)
+    return add_rounded_corners(resized, layer.get("radius", 30))
+
+
+def _shadowed_mockup(path, layer):
+    """Build the mockup layer (with its drop shadow, if any) for a template layer."""
+    if layer.get("style", "phone") == "phone":
+        mockup = create_phone_mockup(path, layer["height"], layer.get("radius", 30))
+    else:
+        mockup = _screenshot_mockup(path, layer)
+
+    shadow = layer.get("shadow")
+    if not shadow:
+        return mockup
+    return add_shadow(
+        mockup,
+        offset=tuple(shadow.get("offset", (6, 6))),
+        blur_radius=shadow.get("blur", 18),
+        shadow_color=tuple(shadow.get("color", (0, 0, 0, 80))),
+    )
 
-    # Headline text
-    headline = "Crie OS pelo\nWhatsApp"
-    draw_text_with_shadow(draw, (40, 115), headline, font_headline, WHITE)
 
-    # Subtitle
-    subtitle = "Mande uma foto, um audio ou texto.\nA IA cria a OS pra voce."
-    draw.text((40, 280), subtitle, font=font_sub, fill=WHITE_80)
+def _draw_mockup(layer, template, size):
+    path = _asset_path(template, layer["source"])
+    params = {k: layer.get(k) for k in ("style", "crop", "height", "max_width", "radius", "shadow")}
+    mockup = cached_layer(
+        ("mockup", file_digest(path), json.dumps(params, sort_keys=True)),
+        lambda: _shadowed_mockup(path, layer),
+    )
+
+    # Position by the mockup itself; the shadow adds offset + 2 * blur around it
+    shadow = layer.get("shadow")
+    w, h = mockup.size
+    blur = 0
+    if shadow:
+        blur = shadow.get("blur", 18)
+        offset = shadow.get("offset", (6, 6))
+        w -= abs(offset[0]) + blur * 2
+        h -= abs(offset[1]) + blur * 2
+    x = _resolve(layer["x"], size[0], w) - blur
+    y = _resolve(layer["y"], size[1], h) - blur
+
+    def paint(tile, ox, oy):
+        tile.paste(mockup, (x - ox, y - oy), mockup)
+    return (x, y, x + mockup.width, y + mockup.height), paint
+
+
+LAYER_RENDERERS = {
+    "logo": _draw_logo,
+    "headline": _draw_text,
+    "subtitle": _draw_text,
+    "checklist": _draw_checklist,
+    "badge": _draw_badge,
+    "mockup": _draw_mockup,
+}
+# Profiled as "text"; the other layers as "layer" (including their decode/resize/blur)
+TEXT_LAYERS = {"headline", "subtitle", "checklist", "badge"}
+
+
+def _union(boxes):
+    return (
+        min(b[0] for b in boxes), min(b[1] for b in boxes),
+        max(b[2] for b in boxes), max(b[3] for b in boxes),
+    )
 
-    # WhatsApp screenshot — larger, bleeds off bottom-right
-    wa_img = Image.open(WHATSAPP_SCREENSHOT).convert("RGBA")
-    crop_top, crop_bottom = 88, 88
-    wa_cropped = wa_img.crop((0, crop_top, wa_img.width, wa_img.height - crop_bottom))
 
-    target_h = 850  # much taller, will bleed off bottom
-    ratio = target_h / wa_cropped.height
-    target_w = int(wa_cropped.width * ratio)
-    wa_resized = wa_cropped.resize((target_w, target_h), Image.LANCZOS)
-    wa_rounded = add_rounded_corners(wa_resized, 28)
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _overlay_tile(tiles, bbox):
+    """Return the overlay tile a layer with this bbox should paint into.
+
+    tiles maps box -> RGBA tile and holds the painted parts of a sparse
+    overlay. Tiles overlapping bbox are merged into one, so a layer sees (and
+    may replace) earlier layers' pixels exactly as on a full-canvas overlay.
+    """
+    overlapping = [box for box in tiles if _overlaps(box, bbox)]
+    while True:
+        box = _union([bbox] + overlapping)
+        more = [b for b in tiles if b not in overlapping and _overlaps(b, box)]
+        if not more:
+            break
+        overlapping += more
+
+    tile = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+    for old in overlapping:
+        tile.paste(tiles.pop(old), (old[0] - box[0], old[1] - box[1]))
+    tiles[box] = tile
+    return box, tile
+
+
+def render_template(template):
+    """Render a (variant-applied) template to an RGB image.
+
+    Layers paint into tiles that cover only their own bounds (merged where
+    layers overlap), and each tile is composited straight into the gradient;
+    the untouched parts of the overlay are never allocated.
+    """
+    W, H = template["size"]
+
+    background = template.get("background", {})
+    stops = _template_stops(template)
+    with stage_profiler.stage("gradient"):
+        canvas = create_gradient(
+            W, H, *stops, direction=background.get("direction", "vertical"), mode="RGBA"
+        )
+
+    tiles = {}
+    for layer in template["layers"]:
+        with stage_profiler.stage("text" if layer["type"] in TEXT_LAYERS else "layer"):
+            bbox, paint = LAYER_RENDERERS[layer["type"]](layer, template, (W, H))
+            # Clip to the canvas; anything outside would be cropped anyway
+            bbox = (max(bbox[0], 0), max(bbox[1], 0), min(bbox[2], W), min(bbox[3], H))
+            if bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+                continue
+            box, tile = _overlay_tile(tiles, bbox)
+            paint(tile, box[0], box[1])
+
+    with stage_profiler.stage("composite"):
+        for box, tile in tiles.items():
+            canvas.alpha_composite(tile, box[:2])
+        return canvas.convert("RGB")
+
+
+def expand_matrix(template_names, variants=None):
+    """Build the render jobs for every template x variant combination."""
+    templates = [load_template(name) for name in template_names]
+    return [
+        apply_variant(template, variant)
+        for template, variant in itertools.product(templates, variants or [{}])
+    ]
 
-    # Position: right side, bleeds off bottom
-    wa_x = W - target_w + 20  # slightly off right edge
-    wa_y = 360
 
-    wa_with_shadow = add_shadow(wa_rounded, offset=(6, 6), blur_radius=15, shadow_color=(0, 0, 0, 80))
-    overlay.paste(wa_with_shadow, (wa_x - 15, wa_y - 15), wa_with_shadow)
+def discover_screenshot_sets(locales=None, themes=None):
+    """Return the (locale, theme) pairs that have an app home screenshot."""
+    sets = []
+    for locale in sorted(os.listdir(SCREENSHOTS_DIR)):
+        if locales and locale not in locales:
+            continue
+        for theme in sorted(os.listdir(os.path.join(SCREENSHOTS_DIR, locale))):
+            if themes and theme not in themes:
+                continue
+            if os.path.exists(os.path.join(SCREENSHOTS_DIR, locale, theme, "home.png")):
+                sets.append((locale, theme))
+    return sets
+
+
+def load_locale_copy(locale):
+    """Load the localized copy overrides for a locale ({} if the template copy is used as is)."""
+    path = os.path.join(LOCALE_DIR, f"{locale}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def expand_locale_matrix(template_names, locales=None, themes=None, variants=None):
+    """Build jobs for every locale x theme x template x variant cell.
+
+    Each cell uses that locale/theme's app screenshot and localized copy and
+    is written to <locale>/<theme>/ under the output directory. The WhatsApp
+    capture only exists in Portuguese, so those templates keep the shared one.
+    """
+    templates = [load_template(name) for name in template_names]
+    jobs = []
+    for locale, theme in discover_screenshot_sets(locales, themes):
+        localized = load_locale_copy(locale)
+        app_screenshot = os.path.join(SCREENSHOTS_DIR, locale, theme, "home.png")
+        for template, variant in itertools.product(templates, variants or [{}]):
+            layers = copy.deepcopy(localized.get(template["name"], {}))
+            for layer_id, overrides in variant.get("layers", {}).items():
+                layers.setdefault(layer_id, {}).update(overrides)
+            output = template["output"]
+            if "name" in variant:
+                output = f"{variant['name']}_{output}"
+            jobs.append(apply_variant(template, {
+                "layers": layers,
+                "assets": {"app": app_screenshot, **variant.get("assets", {})},
+                "output": os.path.join(locale, theme, variant.get("output", output)),
+            }))
+    return jobs
+
+
+def _job_assets(template):
+    """Return the source paths a variant-applied template reads."""
+    paths = set()
+    for layer in template["layers"]:
+        if layer["type"] == "logo":
+            paths.add(_asset_path(template, layer.get("source", "logo")))
+        elif "source" in layer:
+            paths.add(_asset_path(template, layer["source"]))
+    return paths
+
+
+def _share_assets(paths):
+    """Decode sources once and copy their pixels into shared memory blocks."""
+    blocks, specs = [], []
+    for path in sorted(paths):
+        img = load_image(path)
+        data = img.tobytes()
+        block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        block.buf[:len(data)] = data
+        blocks.append(block)
+        specs.append((path, img.size, block.name))
+    return blocks, specs
+
+
+def _init_worker(specs, layer_cache_dir, profile=False):
+    """Seed a worker's decoded-image cache from the parent's shared memory."""
+    set_layer_cache_dir(layer_cache_dir)
+    stage_profiler.enable(profile)
+    stage_profiler.drain()  # forked workers inherit the parent's records
+    for path, size, name in specs:
+        block = shared_memory.SharedMemory(name=name)
+        _SHARED_BLOCKS.append(block)  # keep the mapping alive for frombuffer
+        _DECODED[path] = Image.frombuffer("RGBA", size, block.buf, "raw", "RGBA", 0, 1)
+
+
+def _prewarm(jobs):
+    """Build the gradients, logos, fonts and glyph runs shared by the jobs once, up front.
+
+    Where the pool forks its workers (the default on Linux) they inherit
+    these caches instead of each rebuilding them.
+    """
+    for template in jobs:
+        W, H = template["size"]
+        background = template.get("background", {})
+        _cached_gradient(W, H, _template_stops(template), background.get("direction", "vertical"))
+        for layer in template["layers"]:
+            if layer["type"] == "logo":
+                load_logo(layer["height"], _asset_path(template, layer.get("source", "logo")))
+            elif "size" in layer:
+                font = load_font(layer.get("font", "bold" if layer["type"] == "headline" else "medium"), layer["size"])
+                symbol_font = load_font("symbol", layer["size"])
+                _prewarm_glyphs(layer, font, symbol_font)
+
+
+def _prewarm_glyphs(layer, font, symbol_font):
+    """Rasterize the glyph runs a text layer stamps (see draw_text_run)."""
+    if layer["type"] == "checklist":
+        glyph_run(symbol_font, "\u2713")
+        runs = layer["items"]
+    elif layer["type"] == "badge" and "\u2605" in layer["text"]:
+        glyph_run(symbol_font, "\u2605")
+        runs = layer["text"].split("\u2605", 1)
+    else:
+        runs = [layer.get("text", "")]
+    for text in runs:
+        if text and "\n" not in text:
+            glyph_run(font, text)
 
-    # Badge bottom left
-    draw_badge_with_star(draw, (40, H - 75), "4.8 \u2605  \u00b7  +10.000 OS criadas", font_badge,
-                         font_size=24, bg_color=(255, 255, 255, 35))
 
-    # Compose & crop to canvas
-    bg = bg.convert("RGBA")
-    result = Image.alpha_composite(bg, overlay)
-    result = result.crop((0, 0, W, H))
+def _export_base(template, output_dir):
+    return os.path.splitext(os.path.join(output_dir, template["output"]))[0]
 
-    output = os.path.join(OUTPUT_DIR, "whatsapp_feed_1080x1080.png")
-    result.convert("RGB").save(output, quality=95)
-    print(f"Saved: {output} ({os.path.getsize(output) / 1024:.0f} KB)")
-    return output
 
+def _render_job(template, output_dir, exports):
+    """Render and export one job; returns (export records, profile records)."""
+    with stage_profiler.stage("render", creative=template["output"]):
+        result = render_template(template)
+    records = image_export.export_image(
+        result, _export_base(template, output_dir), exports, creative=template["output"]
+    )
+    return records, stage_profiler.drain()
+
+
+# ===== Incremental builds =====
+#
+# Each output directory keeps a manifest mapping output file -> fingerprint of
+# everything that went into it: this script, the variant-applied template,
+# the source images and the fonts. Outputs whose fingerprint is unchanged are
+# skipped on the next run. The manifest is machine-local (fonts differ per
+# OS) and gitignored; CI keeps it between runs by pointing --manifest at a
+# cached path, next to the committed creatives.
+
+MANIFEST_NAME = ".build-manifest.json"
+DEFAULT_EXPORTS = ["png"]
+
+
+def job_fingerprint(template, exports=()):
+    """Hash the inputs of a render job (content, not paths) and its export variants."""
+    h = hashlib.sha256()
+    h.update(file_digest(os.path.abspath(__file__)).encode())
+    h.update(file_digest(image_export.__file__).encode())
+    params = {k: v for k, v in template.items() if k != "assets"}
+    h.update(json.dumps([params, exports], sort_keys=True).encode("utf-8"))
+    fonts = [resolve_font(style) for style in FONT_CANDIDATES]
+    h.update(json.dumps(fonts).encode("utf-8"))
+    for path in sorted(_job_assets(template)) + sorted({font[0] for font in fonts if font}):
+        if os.path.exists(path):
+            h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def render_batch(jobs, output_dir=OUTPUT_DIR, workers=1, force=False, exports=DEFAULT_EXPORTS,
+                 manifest_path=None):
+    """Render a list of variant-applied templates and save them.
+
+    Source images are decoded once per process (see load_image), so all the
+    jobs in a batch share the decoded logo and screenshots. With workers > 1
+    the jobs are spread over a process pool; the parent decodes every source
+    once and hands the pixels to workers through shared memory. Output is
+    identical to a serial run and is reported in job order.
+
+    Jobs whose output is up to date with the build manifest are skipped
+    unless force is set; the manifest lives in output_dir unless
+    manifest_path says otherwise. Each creative is saved in every variant of the
+    export presets; returns the first variant's path for each job.
+    """
+    variants = image_export.resolve_presets(exports)
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    fingerprints = [job_fingerprint(template, variants) for template in jobs]
+    stale = [
+        (template, fp) for template, fp in zip(jobs, fingerprints)
+        if force
+        or manifest.get(template["output"]) != fp
+        or not all(map(os.path.exists, image_export.export_paths(_export_base(template, output_dir), variants)))
+    ]
+    stale_jobs = [template for template, _ in stale]
 
-def generate_whatsapp_stories():
-    """Generate WhatsApp creative for Stories (1080x1920)."""
-    W, H = 1080, 1920
+    if workers <= 1 or len(stale_jobs) <= 1:
+        rendered = [_render_job(template, output_dir, variants) for template in stale_jobs]
+    else:
+        paths = set().union(*(_job_assets(template) for template in stale_jobs))
+        blocks, specs = _share_assets(paths)
+        _prewarm(stale_jobs)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(stale_jobs)),
+                initializer=_init_worker,
+                initargs=(specs, _layer_cache_dir, stage_profiler.enabled()),
+            ) as pool:
+                rendered = list(pool.map(
+                    _render_job, stale_jobs,
+                    [output_dir] * len(stale_jobs), [variants] * len(stale_jobs),
+                ))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    for _, profile in rendered:
+        stage_profiler.extend(profile)
+    rendered = [records for records, _ in rendered]
+    for records in rendered:
+        for record in records:
+            print(f"Saved: {record.path} ({record.bytes / 1024:.0f} KB, {record.seconds * 1000:.0f} ms)")
+    if len(variants) > 1:
+        image_export.print_report(record for records in rendered for record in records)
+    skipped = len(jobs) - len(stale_jobs)
+    if skipped:
+        print(f"Skipped {skipped} up-to-date creatives:")
+        stale_outputs = {template["output"] for template in stale_jobs}
+        for template in jobs:
+            if template["output"] not in stale_outputs:
+                print(f"  {os.path.join(output_dir, template['output'])}")
+
+    if stale:
+        manifest.update({template["output"]: fp for template, fp in stale})
+        save_manifest(manifest_path, manifest)
+    return [
+        image_export.export_paths(_export_base(template, output_dir), variants[:1])[0]
+        for template in jobs
+    ]
 
-    bg = create_gradient_fast(W, H, GRADIENT_TOP, GRADIENT_BOTTOM)
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
 
-    # Fonts — bigger
-    font_headline = ImageFont.truetype(FONT_PATH, 72, index=FONT_BOLD_INDEX)
-    font_sub = ImageFont.truetype(FONT_PATH, 34, index=FONT_MEDIUM_INDEX)
-    font_badge = ImageFont.truetype(FONT_PATH, 26, index=FONT_MEDIUM_INDEX)
+# ===== CREATIVE 2: WhatsApp Static =====
 
-    # Logo (top center)
-    logo = load_logo(75)
-    logo_x = (W - logo.width) // 2
-    overlay.paste(logo, (logo_x, 60), logo)
+def generate_whatsapp_feed():
+    """Generate WhatsApp creative for Feed (1080x1080)."""
+    return render_batch(expand_matrix(["whatsapp_feed"]))[0]
 
-    # Headline (centered)
-    headline = "Crie OS pelo\nWhatsApp"
-    bbox = draw.textbbox((0, 0), headline, font=font_headline)
-    text_w = bbox[2] - bbox[0]
-    draw_text_with_shadow(draw, ((W - text_w) // 2, 160), headline, font_headline, WHITE)
-
-    # Subtitle (centered)
-    subtitle = "Mande uma foto, um audio\nou texto. A IA cria a OS."
-    bbox_sub = draw.textbbox((0, 0), subtitle, font=font_sub)
-    sub_w = bbox_sub[2] - bbox_sub[0]
-    draw.text(((W - sub_w) // 2, 340), subtitle, font=font_sub, fill=WHITE_80)
-
-    # WhatsApp screenshot — much larger, bleeds off bottom
-    wa_img = Image.open(WHATSAPP_SCREENSHOT).convert("RGBA")
-    crop_top, crop_bottom = 88, 88
-    wa_cropped = wa_img.crop((0, crop_top, wa_img.width, wa_img.height - crop_bottom))
-
-    target_h = 1400  # fills most of the remaining space
-    ratio = target_h / wa_cropped.height
-    target_w = int(wa_cropped.width * ratio)
-    # Cap width
-    if target_w > W - 40:
-        target_w = W - 40
-        ratio = target_w / wa_cropped.width
-        target_h = int(wa_cropped.height * ratio)
-
-    wa_resized = wa_cropped.resize((target_w, target_h), Image.LANCZOS)
-    wa_rounded = add_rounded_corners(wa_resized, 32)
-
-    wa_x = (W - target_w) // 2
-    wa_y = 440
-
-    wa_with_shadow = add_shadow(wa_rounded, offset=(6, 8), blur_radius=18, shadow_color=(0, 0, 0, 80))
-    overlay.paste(wa_with_shadow, (wa_x - 18, wa_y - 18), wa_with_shadow)
-
-    # Badge (centered, near bottom but above the bleed area)
-    badge_text = "4.8 \u2605  \u00b7  +10.000 OS criadas"
-    bbox_badge = font_badge.getbbox(badge_text)
-    badge_w = bbox_badge[2] - bbox_badge[0] + 32
-    badge_x = (W - badge_w) // 2
-    draw_badge_with_star(draw, (badge_x, H - 90), badge_text, font_badge,
-                         font_size=26, bg_color=(255, 255, 255, 35))
-
-    # Compose & crop to canvas
-    bg = bg.convert("RGBA")
-    result = Image.alpha_composite(bg, overlay)
-    result = result.crop((0, 0, W, H))
-
-    output = os.path.join(OUTPUT_DIR, "whatsapp_stories_1080x1920.png")
-    result.convert("RGB").save(output, quality=95)
-    print(f"Saved: {output} ({os.path.getsize(output) / 1024:.0f} KB)")
-    return output
+
+def generate_whatsapp_stories():
+    """Generate WhatsApp creative for Stories (1080x1920)."""
+    return render_batch(expand_matrix(["whatsapp_stories"]))[0]
 
 
 # ===== CREATIVE 3: App =====
 
 def generate_app_feed():
     """Generate App creative for Feed (1080x1080)."""
-    W, H = 1080, 1080
-
-    bg = create_gradient_fast(W, H, GRADIENT_TOP, GRADIENT_BOTTOM)
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-
-    # Fonts — significantly bigger
-    font_headline = ImageFont.truetype(FONT_PATH, 64, index=FONT_BOLD_INDEX)
-    font_badge = ImageFont.truetype(FONT_PATH, 24, index=FONT_MEDIUM_INDEX)
-    font_check = ImageFont.truetype(FONT_PATH, 28, index=FONT_MEDIUM_INDEX)
-
-    # Logo (top left)
-    logo = load_logo(65)
-    overlay.paste(logo, (40, 30), logo)
-
-    # Headline — tighter to logo
-    headline = "Chega de papel.\nControle suas OS\nno app."
-    draw_text_with_shadow(draw, (40, 110), headline, font_headline, WHITE)
-
-    # Checkmarks — bigger text
-    checks = [
-        "OS com fotos e valores",
-        "Controle financeiro",
-        "Agenda com lembretes",
-    ]
-    y_check = 330
-    for check in checks:
-        draw_check_item(draw, 40, y_check, check, font_check, font_size=28)
-        y_check += 42
-
-    # App screenshot — much larger phone, bleeds off bottom-right
-    phone = create_phone_mockup(APP_SCREENSHOT, 950)
-    phone_x = W - phone.width + 60  # bleeds off right edge
-    phone_y = 280  # starts higher, bleeds off bottom
-
-    phone_with_shadow = add_shadow(phone, offset=(6, 6), blur_radius=18, shadow_color=(0, 0, 0, 80))
-    overlay.paste(phone_with_shadow, (phone_x - 18, phone_y - 18), phone_with_shadow)
-
-    # Badge
-    draw_badge(draw, (40, H - 75), "Gratis para comecar  \u00b7  Sem cartao", font_badge,
-               bg_color=(255, 255, 255, 35))
-
-    # Compose & crop to canvas
-    bg = bg.convert("RGBA")
-    result = Image.alpha_composite(bg, overlay)
-    result = result.crop((0, 0, W, H))
-
-    output = os.path.join(OUTPUT_DIR, "app_feed_1080x1080.png")
-    result.convert("RGB").save(output, quality=95)
-    print(f"Saved: {output} ({os.path.getsize(output) / 1024:.0f} KB)")
-    return output
+    return render_batch(expand_matrix(["app_feed"]))[0]
 
 
 def generate_app_stories():
     """Generate App creative for Stories (1080x1920)."""
-    W, H = 1080, 1920
-
-    bg = create_gradient_fast(W, H, GRADIENT_TOP, GRADIENT_BOTTOM)
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-
-    # Fonts — bigger
-    font_headline = ImageFont.truetype(FONT_PATH, 70, index=FONT_BOLD_INDEX)
-    font_badge = ImageFont.truetype(FONT_PATH, 26, index=FONT_MEDIUM_INDEX)
-    font_check = ImageFont.truetype(FONT_PATH, 32, index=FONT_MEDIUM_INDEX)
+    return render_batch(expand_matrix(["app_stories"]))[0]
 
-    # Logo (top center)
-    logo = load_logo(75)
-    logo_x = (W - logo.width) // 2
-    overlay.paste(logo, (logo_x, 55), logo)
 
-    # Headline (centered)
-    headline = "Chega de papel.\nControle suas OS\nno app."
-    bbox = draw.textbbox((0, 0), headline, font=font_headline)
-    text_w = bbox[2] - bbox[0]
-    draw_text_with_shadow(draw, ((W - text_w) // 2, 155), headline, font_headline, WHITE)
-
-    # Checkmarks (centered) — bigger
-    checks = [
-        "OS com fotos e valores",
-        "Controle financeiro",
-        "Agenda com lembretes",
-    ]
-    sfns_check = ImageFont.truetype(SFNS_PATH, 32)
-    check_w_char = sfns_check.getbbox("\u2713")[2] - sfns_check.getbbox("\u2713")[0]
-    y_check = 405
-    for check in checks:
-        text_w_item = font_check.getbbox(check)[2] - font_check.getbbox(check)[0]
-        total_w = check_w_char + 12 + text_w_item
-        start_x = (W - total_w) // 2
-        draw.text((start_x, y_check), "\u2713", font=sfns_check, fill=ACCENT_GREEN)
-        draw.text((start_x + check_w_char + 12, y_check), check, font=font_check, fill=WHITE_80)
-        y_check += 48
-
-    # App screenshot — much larger phone, bleeds off bottom
-    phone = create_phone_mockup(APP_SCREENSHOT, 1350)
-    phone_x = (W - phone.width) // 2
-    phone_y = 560
-
-    phone_with_shadow = add_shadow(phone, offset=(6, 8), blur_radius=18, shadow_color=(0, 0, 0, 80))
-    overlay.paste(phone_with_shadow, (phone_x - 18, phone_y - 18), phone_with_shadow)
-
-    # Badge (centered, near bottom)
-    badge_text = "Gratis para comecar  \u00b7  Sem cartao"
-    bbox_badge = font_badge.getbbox(badge_text)
-    badge_w = bbox_badge[2] - bbox_badge[0] + 32
-    badge_x = (W - badge_w) // 2
-    draw_badge(draw, (badge_x, H - 90), badge_text, font_badge,
-               bg_color=(255, 255, 255, 35))
-
-    # Compose & crop to canvas
-    bg = bg.convert("RGBA")
-    result = Image.alpha_composite(bg, overlay)
-    result = result.crop((0, 0, W, H))
-
-    output = os.path.join(OUTPUT_DIR, "app_stories_1080x1920.png")
-    result.convert("RGB").save(output, quality=95)
-    print(f"Saved: {output} ({os.path.getsize(output) / 1024:.0f} KB)")
-    return output
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--templates", nargs="+", metavar="NAME",
+        help="Templates to render (default: all in templates/)",
+    )
+    parser.add_argument(
+        "--variants", metavar="JSON",
+        help="JSON file with a list of variant overrides; each is rendered for every template",
+    )
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Where to save the creatives")
+    parser.add_argument(
+        "--manifest", metavar="JSON",
+        help=f"Build manifest to read and update (default: {MANIFEST_NAME} in the output dir); "
+        "point it at a cached path to keep incremental builds across CI runs",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="Render creatives in N worker processes (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--asset-cache", metavar="DIR",
+        help="Keep pre-processed logo/mockup layers in DIR across runs",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-render every creative, even if its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--matrix", action="store_true",
+        help="Render every template for each locale/theme screenshot set (into <locale>/<theme>/)",
+    )
+    parser.add_argument("--locales", nargs="+", metavar="LOCALE", help="Limit --matrix to these locales")
+    parser.add_argument("--themes", nargs="+", metavar="THEME", help="Limit --matrix to these themes")
+    parser.add_argument(
+        "--export", nargs="+", default=DEFAULT_EXPORTS, choices=list(image_export.PRESETS), metavar="PRESET",
+        help=f"Formats to save each creative in: {', '.join(image_export.PRESETS)} (default: png)",
+    )
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing report")
+    parser.add_argument("--profile-trace", metavar="JSON", help="Write per-stage timings as a Chrome trace")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     print("=== Generating PraticOS Meta Ads Creatives ===\n")
 
-    print("--- Creative 2: WhatsApp Static ---")
-    generate_whatsapp_feed()
-    generate_whatsapp_stories()
+    variants = None
+    if args.variants:
+        with open(args.variants, encoding="utf-8") as f:
+            variants = json.load(f)
+
+    set_layer_cache_dir(args.asset_cache)
+    stage_profiler.enable(args.profile or bool(args.profile_trace))
+    template_names = args.templates or list_templates()
+    if args.matrix:
+        jobs = expand_locale_matrix(template_names, args.locales, args.themes, variants)
+    else:
+        jobs = expand_matrix(template_names, variants)
+    print(f"--- Rendering {len(jobs)} creatives ---")
+    os.makedirs(args.output_dir, exist_ok=True)
+    render_batch(
+        jobs, args.output_dir, workers=args.jobs, force=args.force, exports=args.export,
+        manifest_path=args.manifest,
+    )
 
-    print("\n--- Creative 3: App ---")
-    generate_app_feed()
-    generate_app_stories()
+    if args.profile:
+        stage_profiler.print_summary()
+    if args.profile_trace:
+        stage_profiler.write_chrome_trace(args.profile_trace)
 
-    print(f"\nDone! All creatives saved to {OUTPUT_DIR}")
+    print(f"\nDone! All creatives are up to date in {args.output_dir}")
 
 
 if __name__ == "__main__":
@@ -7,25 +7,96 @@ Produces AI-generated ad images for the PraticOS campaign:
   - Creative 2: App overview with phone mockup
   - Creative 3: Financial dashboard / business control
 
+Creatives are generated concurrently (--concurrency) under a token-bucket
+rate limit (--rpm). HTTP 429/5xx responses are retried with exponential
+backoff and jitter, honoring Retry-After (up to 5 minutes). Requests share
+one keep-alive connection pool and each reports its connect/upload/wait/
+download time.
+Set GEMINI_API_BASE to point the client at a local mock server.
+
+Generated images are kept in a content-addressed cache (--cache-dir), so an
+identical request (same model, prompt, reference images and config) is
+answered from disk. --replay runs offline from the cache only, which makes
+iterating on the resize/save stage almost instant.
+
+Reference images are read and encoded lazily, once per run, and can be
+recompressed to a per-image byte budget (--reference-budget) to cut the
+upload size. The API key is only read when a request is actually sent, so
+--help, --dry-run and --replay need no credentials.
+
+Responses are streamed: the image's base64 data is decoded as it arrives
+and fed straight to the image parser, and a single decode is resized and
+encoded into every entry of OUTPUTS (plus any --export presets) by the
+parallel export stage in image_export.py.
+
 Usage:
     python3 business/campaigns/meta-ads/creatives/generate_gemini_creatives.py
+    python3 business/campaigns/meta-ads/creatives/generate_gemini_creatives.py --concurrency 4 --rpm 20
+    python3 business/campaigns/meta-ads/creatives/generate_gemini_creatives.py --replay
+    python3 business/campaigns/meta-ads/creatives/generate_gemini_creatives.py --dry-run --reference-budget 300
 """
 
+import argparse
+import email.utils
+import functools
+import hashlib
 import os
+import random
+import re
+import threading
+import gzip
 import yaml
 import requests
+import requests.adapters
+import urllib3
 import json
 import base64
 import io
 import time
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageFile
+
+import image_export
 
 # --- Config ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CREDS = yaml.safe_load(open(os.path.expanduser("~/.gemini.yaml")))
-API_KEY = CREDS["api_key"]
+CREDS_PATH = os.path.expanduser("~/.gemini.yaml")
 MODEL = "gemini-3-pro-image-preview"
-URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent?key={API_KEY}"
+API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+
+# --- Scheduling ---
+MAX_CONCURRENCY = 3          # requests in flight at once
+REQUESTS_PER_MINUTE = 10     # token bucket refill rate
+BACKOFF_BASE = 5             # seconds, doubled on every retry
+BACKOFF_MAX = 120            # seconds
+RETRY_AFTER_MAX = 300        # seconds; longer server Retry-After values are capped
+
+# --- HTTP ---
+POOL_SIZE = MAX_CONCURRENCY  # keep-alive connections kept open
+CONNECT_TIMEOUT = 10         # seconds
+READ_TIMEOUT = 180           # seconds
+GZIP_REQUESTS = False        # gzip request bodies (Content-Encoding: gzip)
+
+# --- Response cache ---
+CACHE_DIR = os.environ.get(
+    "GEMINI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "praticos", "gemini")
+)
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# --- Reference images ---
+REFERENCE_MAX_BYTES = None   # per-image upload budget; None sends the original file
+REFERENCE_QUALITIES = (90, 80, 70)  # WebP qualities tried before downscaling
+REFERENCE_MIN_SIDE = 512     # never downscale a reference below this (px)
+
+# --- Outputs ---
+# Files written per generated image: (suffix, format, size, save options),
+# see image_export.py. One decode feeds every output.
+OUTPUT_SIZE = (1080, 1080)
+OUTPUTS = [
+    (".jpg", "JPEG", OUTPUT_SIZE, {"quality": 98, "subsampling": 0}),  # Meta prefers JPEG
+    (".png", "PNG", OUTPUT_SIZE, {}),
+]
+STREAM_CHUNK = 64 * 1024     # bytes read from the response at a time
 
 OUTPUT_DIR = SCRIPT_DIR
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", ".."))
@@ -40,94 +111,549 @@ DASHBOARD_PATH = os.path.join(
 )
 
 
-def load_image_base64(path):
-    """Load an image as base64 for Gemini API."""
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+@functools.lru_cache(maxsize=None)
+def api_key():
+    """Read the Gemini API key on first use ($GEMINI_API_KEY or ~/.gemini.yaml)."""
+    key = os.environ.get("GEMINI_API_KEY")
+    if key:
+        return key
+    with open(CREDS_PATH) as f:
+        return yaml.safe_load(f)["api_key"]
 
 
-LOGO_B64 = load_image_base64(LOGO_PATH)
-HOME_B64 = load_image_base64(HOME_PATH)
-DASHBOARD_B64 = load_image_base64(DASHBOARD_PATH)
+def request_url():
+    return f"{API_BASE}/models/{MODEL}:generateContent?key={api_key()}"
 
 
-def generate_image(prompt, output_name, extra_images=None, retries=2):
-    """Generate an image using Gemini API with the real logo as reference.
+# --- Reference images ---
+#
+# Each reference image is read and base64-encoded once, on first use, and
+# the same string is shared by every request (and thread) that attaches it.
 
-    Args:
-        extra_images: List of base64-encoded images to include as additional references.
+_references = {}
+_references_lock = threading.Lock()
+
+
+def _fit_reference(raw, max_bytes):
+    """Recompress (and if needed downscale) image bytes to fit max_bytes as WebP."""
+    img = Image.open(io.BytesIO(raw))
+    img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+    data = raw
+    while True:
+        for quality in REFERENCE_QUALITIES:
+            buf = io.BytesIO()
+            img.save(buf, "WEBP", quality=quality, method=4)
+            data = buf.getvalue()
+            if len(data) <= max_bytes:
+                return data
+        if min(img.size) * 3 // 4 < REFERENCE_MIN_SIDE:
+            return data  # best effort
+        img = img.resize((img.width * 3 // 4, img.height * 3 // 4), Image.LANCZOS)
+
+
+def reference_image(path, max_bytes=None):
+    """Return the inlineData dict for a reference image, encoding it once per process.
+
+    With max_bytes, images larger than the budget are recompressed to WebP
+    (downscaling if quality alone is not enough) before encoding.
     """
+    key = (path, max_bytes)
+    with _references_lock:
+        if key not in _references:
+            with open(path, "rb") as f:
+                raw = f.read()
+            mime = "image/png"
+            if max_bytes and len(raw) > max_bytes:
+                raw = _fit_reference(raw, max_bytes)
+                mime = "image/webp"
+            _references[key] = {"mimeType": mime, "data": base64.b64encode(raw).decode("ascii")}
+        return _references[key]
+
+
+def build_payload(prompt, extra_images=None, reference_max_bytes=REFERENCE_MAX_BYTES):
+    """generateContent payload: the logo, then extra_images (paths), then the prompt."""
     parts = [
-        {
-            "inlineData": {
-                "mimeType": "image/png",
-                "data": LOGO_B64,
-            }
-        },
+        {"inlineData": reference_image(path, reference_max_bytes)}
+        for path in [LOGO_PATH, *(extra_images or [])]
     ]
-    for img_b64 in (extra_images or []):
-        parts.append({
-            "inlineData": {
-                "mimeType": "image/png",
-                "data": img_b64,
-            }
-        })
     parts.append({"text": prompt})
-
-    payload = {
+    return {
         "contents": [{"parts": parts}],
         "generationConfig": {
             "responseModalities": ["TEXT", "IMAGE"],
         },
     }
 
+
+# --- HTTP session ---
+#
+# One pooled keep-alive session is shared by all requests. Its connections
+# record how long each request spends connecting, uploading the body and
+# waiting for the response, so slow generations can be attributed.
+
+_timings = threading.local()
+
+
+def _record_timing(stage, seconds):
+    current = getattr(_timings, "current", None)
+    if current is not None:
+        current[stage] = current.get(stage, 0.0) + seconds
+
+
+class _TimedConnectionMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _record_timing("connect", time.perf_counter() - start)
+
+    def request(self, *args, **kwargs):
+        # Plain HTTP connects lazily inside request(); don't count that twice
+        current = getattr(_timings, "current", None) or {}
+        connect_before = current.get("connect", 0.0)
+        start = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            connected = current.get("connect", 0.0) - connect_before
+            _record_timing("upload", time.perf_counter() - start - connected)
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            _record_timing("wait", time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = type("TimedHTTPConnection", (_TimedConnectionMixin, urllib3.connection.HTTPConnection), {})
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = type("TimedHTTPSConnection", (_TimedConnectionMixin, urllib3.connection.HTTPSConnection), {})
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose pooled connections report per-stage timings."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def create_session(pool_size=POOL_SIZE):
+    """Create a keep-alive session with up to pool_size pooled connections."""
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def post_json(session, url, payload, timeout=None, gzip_body=GZIP_REQUESTS, stream=False):
+    """POST a JSON payload and read the whole response.
+
+    Returns (response, timings), where timings holds seconds spent per stage
+    (connect, upload, wait, download, total) and the bytes sent. With
+    stream=True a 200 body is left unread for the caller to consume:
+    download is 0 and total stops at the headers, for the caller to add the
+    time it spends reading the body.
+    """
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if gzip_body:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+
+    _timings.current = timings = {"connect": 0.0, "upload": 0.0, "wait": 0.0}
+    start = time.perf_counter()
+    try:
+        resp = session.post(url, data=body, headers=headers, timeout=timeout, stream=stream)
+        streamed = stream and resp.status_code == 200
+        if not streamed:
+            resp.content  # read the body so download time is included
+    finally:
+        _timings.current = None
+    timings["total"] = time.perf_counter() - start
+    timings["download"] = 0.0 if streamed else max(
+        timings["total"] - timings["connect"] - timings["upload"] - timings["wait"], 0.0
+    )
+    timings["sent_bytes"] = len(body)
+    return resp, timings
+
+
+def format_timings(timings):
+    return (
+        f"{timings['total']:.1f}s (connect {timings['connect']:.2f}s, "
+        f"upload {timings['upload']:.2f}s, wait {timings['wait']:.1f}s, "
+        f"download {timings['download']:.2f}s, {timings['sent_bytes'] / 1024 / 1024:.1f} MB sent)"
+    )
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how often requests may start.
+
+    Refills `rate` tokens per second up to `capacity`. pause() stops all
+    callers until a deadline, e.g. after the server answers 429 Retry-After.
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retrying: Retry-After if given (capped), else backoff with full jitter."""
+    if retry_after is not None:
+        return min(retry_after, RETRY_AFTER_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class ResponseCache:
+    """Content-addressed on-disk store of generated image bytes.
+
+    Entries are keyed by a hash of everything that determines the output
+    (model, prompt, inline images, generationConfig). Hits refresh the entry's
+    mtime; once the cache grows past max_bytes the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(payload, model=MODEL):
+        request = {
+            "model": model,
+            "contents": payload["contents"],
+            "generationConfig": payload.get("generationConfig", {}),
+        }
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the cached image bytes for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        with self.lock:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+def generate_image(prompt, output_name, extra_images=None, retries=2, limiter=None, session=None,
+                   gzip_body=GZIP_REQUESTS, timeout=None, cache=None, replay=False,
+                   reference_max_bytes=REFERENCE_MAX_BYTES, outputs=OUTPUTS):
+    """Generate an image using Gemini API with the real logo as reference.
+
+    Args:
+        extra_images: Paths of images to include as additional references.
+        limiter: TokenBucket shared by concurrent calls (one per call if omitted).
+        session: Pooled session from create_session() (one per call if omitted).
+        timeout: (connect, read) seconds; defaults to CONNECT_TIMEOUT/READ_TIMEOUT.
+        cache: ResponseCache consulted before and filled after a generation.
+        replay: Only serve from the cache; never call the API.
+        reference_max_bytes: Per-image budget for the attached references.
+        outputs: Export variants written for the generated image (see OUTPUTS).
+    """
+    limiter = limiter or TokenBucket(REQUESTS_PER_MINUTE / 60, 1)
+    session = session or create_session()
+    payload = build_payload(prompt, extra_images, reference_max_bytes)
+
+    key = cache.key(payload) if cache else None
+    if cache:
+        img_data = cache.get(key)
+        if img_data is not None:
+            print(f"  [{output_name}] Cache hit {key[:12]}")
+            return save_image(img_data, output_name, outputs)
+    if replay:
+        print(f"  [{output_name}] Not in cache, skipped (replay)")
+        return None
+
     for attempt in range(retries + 1):
-        print(f"  Generating {output_name} (attempt {attempt + 1})...")
-        resp = requests.post(URL, json=payload, timeout=180)
-
-        if resp.status_code == 200:
-            data = resp.json()
-            candidates = data.get("candidates", [])
-            if candidates:
-                parts = candidates[0].get("content", {}).get("parts", [])
-                for part in parts:
-                    if "inlineData" in part:
-                        img_data = base64.b64decode(part["inlineData"]["data"])
-                        img = Image.open(io.BytesIO(img_data))
-                        native_w, native_h = img.size
-                        print(f"  Native size: {native_w}x{native_h}")
-
-                        # Place on 1080x1080 canvas (center the native image)
-                        canvas = Image.new("RGB", (1080, 1080), (10, 30, 80))
-                        # Scale up to fill 1080x1080 using high-quality resampling
-                        img_resized = img.resize((1080, 1080), Image.LANCZOS)
-                        canvas.paste(img_resized, (0, 0))
-
-                        output = os.path.join(OUTPUT_DIR, output_name)
-                        # Save as high-quality JPEG (Meta prefers JPEG, avoids PNG metadata issues)
-                        output_jpg = output.replace('.png', '.jpg')
-                        canvas.save(output_jpg, "JPEG", quality=98, subsampling=0)
-                        # Also save PNG version
-                        canvas.save(output, "PNG", quality=95)
-                        size_kb = os.path.getsize(output_jpg) / 1024
-                        print(f"  Saved: {output_jpg} (1080x1080, {size_kb:.0f}KB)")
-                        return output_jpg
-
-            print(f"  No image in response")
-        elif resp.status_code == 429:
-            print(f"  Rate limited, waiting 30s...")
-            time.sleep(30)
-            continue
+        limiter.acquire()
+        print(f"  [{output_name}] Generating (attempt {attempt + 1})...")
+        try:
+            resp, timings = post_json(
+                session, request_url(), payload, timeout=timeout, gzip_body=gzip_body, stream=True
+            )
+        except requests.RequestException as e:
+            print(f"  [{output_name}] Request failed: {e}")
+            delay = retry_delay(attempt)
         else:
-            print(f"  Error {resp.status_code}: {resp.text[:300]}")
+            img = read_error = None
+            if resp.status_code == 200:
+                # The body is streamed through the decoder: that is the download
+                start = time.perf_counter()
+                try:
+                    img, img_data = read_response_image(resp, keep_bytes=bool(cache))
+                except (requests.RequestException, OSError, ValueError) as e:
+                    # ValueError covers binascii.Error from a truncated or bad base64 tail
+                    read_error = e
+                timings["download"] = time.perf_counter() - start
+                timings["total"] += timings["download"]
+            print(f"  [{output_name}] HTTP {resp.status_code} in {format_timings(timings)}")
+            if read_error is not None:
+                print(f"  [{output_name}] Reading response failed: {read_error}")
+            if img is not None:
+                if cache:
+                    cache.put(key, img_data)
+                return write_outputs(img, output_name, outputs)
+            if resp.status_code == 200:
+                if read_error is None:
+                    print(f"  [{output_name}] No image in response")
+                delay = retry_delay(attempt)
+            elif resp.status_code == 429 or resp.status_code >= 500:
+                delay = retry_delay(attempt, parse_retry_after(resp.headers.get("Retry-After")))
+                print(f"  [{output_name}] Retrying in {delay:.0f}s...")
+                if resp.status_code == 429:
+                    # Everyone backs off, not just this request
+                    limiter.pause(delay)
+            else:
+                print(f"  [{output_name}] Error {resp.status_code}: {resp.text[:300]}")
+                delay = retry_delay(attempt)
 
         if attempt < retries:
-            time.sleep(5)
+            time.sleep(delay)
 
-    print(f"  FAILED to generate {output_name}")
+    print(f"  [{output_name}] FAILED to generate")
     return None
 
 
+class InlineDataDecoder:
+    """Incrementally decode the first inlineData image of a generateContent body.
+
+    feed() takes raw JSON chunks and returns the image bytes decoded so far,
+    so neither the JSON text nor the base64 string is ever held in full.
+    """
+
+    MARKER = b'"inlineData"'
+    DATA_KEY = re.compile(rb'"data"\s*:\s*"')
+    SPECIAL = re.compile(rb'["\\]')  # end of the string or start of an escape
+    NOT_BASE64 = re.compile(rb"[^A-Za-z0-9+/=]")  # line breaks etc., skipped by b64decode anyway
+    ESCAPES = {
+        b'"': b'"', b"\\": b"\\", b"/": b"/", b"b": b"\b",
+        b"f": b"\f", b"n": b"\n", b"r": b"\r", b"t": b"\t",
+    }
+
+    def __init__(self):
+        self.buf = b""
+        self.pending = b""  # base64 characters not yet forming a full quantum
+        self.state = "search"  # search -> key -> data -> done
+
+    @property
+    def done(self):
+        return self.state == "done"
+
+    def feed(self, chunk):
+        if self.done:
+            return b""
+        self.buf += chunk
+        if self.state == "search":
+            i = self.buf.find(self.MARKER)
+            if i < 0:
+                self.buf = self.buf[-len(self.MARKER):]
+                return b""
+            self.buf, self.state = self.buf[i + len(self.MARKER):], "key"
+        if self.state == "key":
+            match = self.DATA_KEY.search(self.buf)
+            if not match:
+                self.buf = self.buf[-32:]
+                return b""
+            self.buf, self.state = self.buf[match.end():], "data"
+
+        text = self.pending + self.NOT_BASE64.sub(b"", self._unescape())
+        n = len(text) if self.done else len(text) // 4 * 4
+        self.pending = text[n:]
+        return base64.b64decode(text[:n])
+
+    def _unescape(self):
+        """Take the JSON string characters buffered so far, undoing escapes.
+
+        An escape cut off at the end of the buffer is kept for the next chunk.
+        """
+        buf, out, i = self.buf, bytearray(), 0
+        while True:
+            match = self.SPECIAL.search(buf, i)
+            if not match:
+                out += buf[i:]
+                i = len(buf)
+                break
+            j = match.start()
+            out += buf[i:j]
+            if buf[j:j + 1] == b'"':
+                i, self.state = j + 1, "done"
+                break
+            code = buf[j + 1:j + 2]
+            if not code or (code == b"u" and len(buf) < j + 6):
+                i = j
+                break
+            if code == b"u":
+                out += chr(int(buf[j + 2:j + 6], 16)).encode()
+                i = j + 6
+            elif code in self.ESCAPES:
+                out += self.ESCAPES[code]
+                i = j + 2
+            else:
+                raise ValueError(f"invalid JSON escape {buf[j:j + 2]!r} in inlineData")
+        self.buf = b"" if self.done else buf[i:]
+        return bytes(out)
+
+
+def read_response_image(resp, keep_bytes=False):
+    """Stream a generateContent response into a decoded image.
+
+    Returns (image, image bytes); the bytes are only kept when keep_bytes is
+    set (for the response cache). image is None when there is no inline image.
+    """
+    decoder = InlineDataDecoder()
+    parser = ImageFile.Parser()
+    kept = bytearray() if keep_bytes else None
+    try:
+        for chunk in resp.iter_content(STREAM_CHUNK):
+            data = decoder.feed(chunk)
+            if data:
+                parser.feed(data)
+                if kept is not None:
+                    kept += data
+            if decoder.done:
+                break
+    finally:
+        resp.close()
+    if not decoder.done:
+        return None, None
+    return parser.close(), bytes(kept) if kept is not None else None
+
+
+def write_outputs(img, output_name, outputs=OUTPUTS):
+    """Resize and encode one decoded image into every output; return the first path."""
+    native_w, native_h = img.size
+    print(f"  [{output_name}] Native size: {native_w}x{native_h}")
+
+    base = os.path.splitext(os.path.join(OUTPUT_DIR, output_name))[0]
+    records = image_export.export_image(img, base, outputs)
+    for record in records:
+        print(
+            f"  [{output_name}] Saved: {record.path} ({record.size[0]}x{record.size[1]}, "
+            f"{record.bytes / 1024:.0f}KB, {record.seconds * 1000:.0f}ms)"
+        )
+    return records[0].path
+
+
+def save_image(img_data, output_name, outputs=OUTPUTS):
+    """Decode cached image bytes and write every output; return the first path."""
+    with Image.open(io.BytesIO(img_data)) as img:
+        img.load()
+        return write_outputs(img, output_name, outputs)
+
+
+def generate_all(creatives, concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                 pool_size=None, gzip_body=GZIP_REQUESTS, read_timeout=READ_TIMEOUT,
+                 cache=None, replay=False, reference_max_bytes=REFERENCE_MAX_BYTES, outputs=OUTPUTS):
+    """Generate (filename, prompt, extra_images) creatives concurrently.
+
+    At most `concurrency` requests are in flight; all of them share one token
+    bucket, one keep-alive session and the response cache. Results are
+    returned in input order.
+    """
+    limiter = TokenBucket(requests_per_minute / 60, capacity=max(1, concurrency))
+    with create_session(pool_size or concurrency) as session, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(
+                generate_image, prompt, filename, extra_images=extra_imgs,
+                limiter=limiter, session=session, gzip_body=gzip_body,
+                timeout=(CONNECT_TIMEOUT, read_timeout), cache=cache, replay=replay,
+                reference_max_bytes=reference_max_bytes, outputs=outputs,
+            )
+            for filename, prompt, extra_imgs in creatives
+        ]
+        return [future.result() for future in futures]
+
+
 # --- Creative Prompts ---
 
 LOGO_INSTRUCTION = """IMPORTANT - LOGO: The attached image is the official PraticOS logo. You MUST use this EXACT logo in the top-left corner of the ad. Do NOT generate or invent a different logo. Reproduce the attached logo faithfully — it shows "PRATIC" in white and "OS" in yellow on a blue background with an orange accent."""
@@ -224,21 +750,100 @@ STYLE: Clean, premium, professional SaaS ad. Apple-quality aesthetic. The phone
 """
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Meta Ads creatives with Gemini.")
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENCY,
+        help=f"Requests in flight at once (default: {MAX_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=REQUESTS_PER_MINUTE,
+        help=f"Maximum requests started per minute (default: {REQUESTS_PER_MINUTE})",
+    )
+    parser.add_argument(
+        "--pool-size", type=int,
+        help="Keep-alive connections to keep open (default: --concurrency)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=READ_TIMEOUT,
+        help=f"Seconds to wait for a response (default: {READ_TIMEOUT})",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Gzip request bodies")
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR,
+        help=f"Response cache directory (default: {CACHE_DIR}, or $GEMINI_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=CACHE_MAX_BYTES // (1024 * 1024), metavar="MB",
+        help="Evict least recently used responses past this size (default: %(default)s)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API")
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="Offline: only use cached responses, skip creatives that are not cached",
+    )
+    parser.add_argument(
+        "--reference-budget", type=int, metavar="KB",
+        help="Recompress reference images larger than this before upload (default: send originals)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Print each request's upload size without calling the API",
+    )
+    parser.add_argument(
+        "--export", nargs="+", default=[], choices=list(image_export.PRESETS), metavar="PRESET",
+        help=f"Extra formats to save at {OUTPUT_SIZE[0]}x{OUTPUT_SIZE[1]}: {', '.join(image_export.PRESETS)}",
+    )
+    args = parser.parse_args()
+    if args.rpm <= 0:
+        parser.error("--rpm must be greater than 0")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.pool_size is not None and args.pool_size < 1:
+        parser.error("--pool-size must be at least 1")
+    if args.replay and args.no_cache:
+        parser.error("--replay needs the cache; drop --no-cache")
+    return args
+
+
+def output_variants(presets):
+    """OUTPUTS plus the --export presets, sized relative to OUTPUT_SIZE."""
+    variants = list(OUTPUTS)
+    for suffix, fmt, size, options in image_export.resolve_presets(presets):
+        if size is None:
+            size = OUTPUT_SIZE
+        elif isinstance(size, (int, float)):
+            size = tuple(round(d * size) for d in OUTPUT_SIZE)
+        if all(suffix != existing[0] for existing in variants):
+            variants.append((suffix, fmt, size, options))
+    return variants
+
+
 def main():
+    args = parse_args()
     print("=== Generating PraticOS Meta Ads Creatives with Gemini ===\n")
 
     creatives = [
         ("gemini_whatsapp_1080x1080.png", CREATIVE_WHATSAPP, None),
-        ("gemini_app_1080x1080.png", CREATIVE_APP, [HOME_B64]),
-        ("gemini_dashboard_1080x1080.png", CREATIVE_DASHBOARD, [DASHBOARD_B64]),
+        ("gemini_app_1080x1080.png", CREATIVE_APP, [HOME_PATH]),
+        ("gemini_dashboard_1080x1080.png", CREATIVE_DASHBOARD, [DASHBOARD_PATH]),
     ]
-
-    results = []
-    for filename, prompt, extra_imgs in creatives:
-        print(f"\n--- {filename} ---")
-        result = generate_image(prompt, filename, extra_images=extra_imgs)
-        results.append(result)
-        time.sleep(5)  # Rate limit buffer
+    reference_max_bytes = args.reference_budget * 1024 if args.reference_budget else None
+
+    if args.dry_run:
+        for filename, prompt, extra_imgs in creatives:
+            payload = build_payload(prompt, extra_imgs, reference_max_bytes)
+            size_mb = len(json.dumps(payload)) / 1024 / 1024
+            print(f"  [{filename}] {len(payload['contents'][0]['parts']) - 1} references, {size_mb:.2f} MB")
+        return
+
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    results = generate_all(
+        creatives, concurrency=args.concurrency, requests_per_minute=args.rpm,
+        pool_size=args.pool_size, gzip_body=args.gzip, read_timeout=args.timeout,
+        cache=cache, replay=args.replay, reference_max_bytes=reference_max_bytes,
+        outputs=output_variants(args.export),
+    )
 
     print(f"\n=== Summary ===")
     for r in results:
@@ -0,0 +1,120 @@
+"""
+Export stage shared by the creative generators.
+
+One composed image is encoded into a set of variants (format, size,
+quality) by a pool of threads -- Pillow releases the GIL while encoding, so
+the variants are produced in parallel. Every variant reports its size in
+bytes and its encode time, to pick the best size/quality trade-off for Meta
+uploads.
+
+A variant is (suffix, format, size, save options). The suffix is appended to
+the output path without its extension; size is None (as composed), a scale
+factor (thumbnails) or an exact (width, height).
+"""
+
+import collections
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+import stage_profiler
+
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+
+PRESETS = {
+    "png": [(".png", "PNG", None, {"compress_level": 6})],
+    "jpeg": [
+        ("_q95.jpg", "JPEG", None, {"quality": 95, "subsampling": 0}),
+        ("_q90.jpg", "JPEG", None, {"quality": 90, "subsampling": 0}),
+        ("_q85.jpg", "JPEG", None, {"quality": 85}),
+    ],
+    "webp": [
+        ("_q90.webp", "WEBP", None, {"quality": 90, "method": 4}),
+        ("_lossless.webp", "WEBP", None, {"lossless": True, "method": 4}),
+    ],
+    "avif": [("_q80.avif", "AVIF", None, {"quality": 80, "speed": 6})],
+    "thumbs": [("_thumb.jpg", "JPEG", 0.25, {"quality": 85})],
+}
+
+Exported = collections.namedtuple("Exported", "path variant size bytes seconds")
+
+
+def resolve_presets(names):
+    """Expand preset names into a list of variants, dropping formats this Pillow can't write."""
+    variants = []
+    for name in names:
+        if name not in PRESETS:
+            raise KeyError(f"Unknown export preset '{name}' (choose from {', '.join(PRESETS)})")
+        for variant in PRESETS[name]:
+            if variant[1] == "AVIF" and not features.check("avif"):
+                print(f"  (skipping {variant[0]}: Pillow was built without AVIF support)")
+                continue
+            variants.append(variant)
+    return variants
+
+
+def export_paths(base, variants):
+    """The files export_image will write for base (a path without extension)."""
+    return [base + suffix for suffix, _, _, _ in variants]
+
+
+def _target_size(size, spec):
+    if spec is None:
+        return size
+    if isinstance(spec, (int, float)):
+        return max(1, round(size[0] * spec)), max(1, round(size[1] * spec))
+    return tuple(spec)
+
+
+def _encode(img, path, variant, creative):
+    suffix, fmt, _, options = variant
+    with stage_profiler.stage("encode", creative) as record:
+        start = time.perf_counter()
+        img.save(path, fmt, **options)
+        seconds = time.perf_counter() - start
+        record["bytes"] = os.path.getsize(path)
+    return Exported(path, suffix, img.size, os.path.getsize(path), seconds)
+
+
+def export_image(img, base, variants, workers=EXPORT_WORKERS, mode="RGB", creative=None):
+    """Encode img into every variant (base + suffix) using parallel encoder threads.
+
+    Each distinct size is resized once (LANCZOS) and converted to mode.
+    creative labels the encode stages when profiling (default: base's name).
+    Returns an Exported record per variant, in variant order.
+    """
+    img.load()
+    creative = creative or os.path.basename(base)
+    os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+    resized = {}
+    for _, _, spec, _ in variants:
+        size = _target_size(img.size, spec)
+        if size not in resized:
+            with stage_profiler.stage("resize", creative):
+                scaled = img if size == img.size else img.resize(size, Image.LANCZOS)
+                resized[size] = scaled if scaled.mode == mode else scaled.convert(mode)
+    jobs = [
+        (resized[_target_size(img.size, variant[2])], base + variant[0], variant, creative)
+        for variant in variants
+    ]
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [_encode(*job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(lambda job: _encode(*job), jobs))
+
+
+def print_report(results):
+    """Print average bytes and encode time per variant over a batch of exports."""
+    by_variant = collections.defaultdict(list)
+    for record in results:
+        by_variant[record.variant].append(record)
+    if not by_variant:
+        return
+    print(f"\n  {'variant':<16}{'files':>6}{'avg size':>11}{'avg encode':>12}")
+    for variant, records in by_variant.items():
+        avg_kb = sum(r.bytes for r in records) / len(records) / 1024
+        avg_ms = sum(r.seconds for r in records) / len(records) * 1000
+        print(f"  {variant:<16}{len(records):>6}{avg_kb:>8.0f} KB{avg_ms:>9.0f} ms")
@@ -0,0 +1,139 @@
+"""
+Per-stage profiling hooks for the image pipelines.
+
+Wrap a pipeline stage in `with stage("resize", creative=name):` to record
+its wall time, the Pillow image buffers allocated while it ran, and (if the
+stage sets `record["bytes"]`) the bytes it wrote. Profiling is off by
+default: until enable() is called, stage() costs one flag check.
+
+Stages may nest (a render contains decode, resize, blur...) and times are
+inclusive. Allocation counts are process-wide, so they blur together when
+stages overlap in threads. Records from worker processes can be collected
+with drain() and merged back with extend().
+"""
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+from PIL import Image
+
+_enabled = False
+_records = []
+_lock = threading.Lock()
+_context = threading.local()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def _allocations():
+    return Image.core.get_stats()["new_count"]
+
+
+@contextlib.contextmanager
+def stage(name, creative=None):
+    """Record one run of a stage; yields the record so callers can add "bytes"."""
+    if not _enabled:
+        yield {}
+        return
+    parent = getattr(_context, "creative", None)
+    creative = creative or parent
+    _context.creative = creative
+    record = {
+        "stage": name,
+        "creative": creative,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "bytes": 0,
+    }
+    allocs = _allocations()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["start"] = start
+        record["seconds"] = time.perf_counter() - start
+        record["allocs"] = _allocations() - allocs
+        _context.creative = parent
+        with _lock:
+            _records.append(record)
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def drain():
+    """Return and forget the records so far (e.g. to send them from a worker)."""
+    with _lock:
+        drained = list(_records)
+        _records.clear()
+    return drained
+
+
+def extend(more):
+    with _lock:
+        _records.extend(more)
+
+
+def print_summary(recs=None):
+    """Print totals per stage, then inclusive time per creative and stage."""
+    recs = records() if recs is None else recs
+    if not recs:
+        return
+    by_stage = collections.defaultdict(list)
+    for r in recs:
+        by_stage[r["stage"]].append(r)
+
+    print("\n=== Profile (inclusive wall time) ===")
+    print(f"  {'stage':<12}{'calls':>7}{'total':>11}{'mean':>10}{'allocs':>8}{'output':>11}")
+    for name, rs in sorted(by_stage.items(), key=lambda item: -sum(r["seconds"] for r in item[1])):
+        total = sum(r["seconds"] for r in rs) * 1000
+        out_kb = sum(r["bytes"] for r in rs) / 1024
+        print(
+            f"  {name:<12}{len(rs):>7}{total:>9.1f}ms{total / len(rs):>8.1f}ms"
+            f"{sum(r['allocs'] for r in rs):>8}{out_kb:>8.0f} KB"
+        )
+
+    stages = list(by_stage)
+    per_creative = collections.defaultdict(collections.Counter)
+    for r in recs:
+        per_creative[r["creative"] or "-"][r["stage"]] += r["seconds"] * 1000
+    width = max(len(c) for c in per_creative) + 2
+    print(f"\n  {'creative':<{width}}" + "".join(f"{s:>11}" for s in stages))
+    for creative, times in sorted(per_creative.items()):
+        cells = "".join(f"{times[s]:>9.1f}ms" if s in times else f"{'-':>11}" for s in stages)
+        print(f"  {creative:<{width}}{cells}")
+
+
+def write_chrome_trace(path, recs=None):
+    """Write the records as Chrome trace events (open in chrome://tracing or Perfetto)."""
+    recs = records() if recs is None else recs
+    origin = min((r["start"] for r in recs), default=0.0)
+    events = [
+        {
+            "name": r["stage"],
+            "cat": "stage",
+            "ph": "X",
+            "ts": (r["start"] - origin) * 1e6,
+            "dur": r["seconds"] * 1e6,
+            "pid": r["pid"],
+            "tid": r["tid"],
+            "args": {"creative": r["creative"], "allocs": r["allocs"], "bytes": r["bytes"]},
+        }
+        for r in recs
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"\nTrace saved: {path} ({len(events)} events)")
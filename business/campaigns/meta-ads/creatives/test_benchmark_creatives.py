@@ -0,0 +1,37 @@
+"""Tests for the baseline save/compare of benchmark_creatives.py."""
+
+import json
+
+import benchmark_creatives as bench
+
+RESULTS = {"gradient feed": {"ms": 10.0, "peak_mb": 50.0}}
+
+
+def test_compare_on_same_environment_has_no_note(tmp_path, capsys):
+    path = tmp_path / "baseline.json"
+    bench.save_baseline(path, RESULTS)
+    capsys.readouterr()
+
+    assert bench.compare_baseline(path, RESULTS) == []
+    assert "baseline was recorded on" not in capsys.readouterr().out
+
+
+def test_compare_on_other_environment_prints_note(tmp_path, capsys):
+    path = tmp_path / "baseline.json"
+    bench.save_baseline(path, RESULTS)
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline["environment"]["cpus"] = -1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f)
+    capsys.readouterr()
+
+    bench.compare_baseline(path, RESULTS)
+    assert "baseline was recorded on" in capsys.readouterr().out
+
+
+def test_shadow_error_within_documented_tolerance():
+    for _, size, blur, offset in bench.SHADOW_CASES:
+        img = bench.synthetic_mockup(size)
+        kwargs = dict(offset=offset, blur_radius=blur, shadow_color=(0, 0, 0, 80))
+        assert bench.shadow_error(img, **kwargs) <= bench.gc.SHADOW_MAX_ERROR
@@ -0,0 +1,48 @@
+"""Tests for the streaming inlineData decoder of generate_gemini_creatives.py."""
+
+import base64
+import json
+
+import pytest
+
+from generate_gemini_creatives import InlineDataDecoder
+
+IMAGE = bytes(range(256)) * 4
+
+
+def escaped_body(data):
+    """A generateContent body with its base64 escaped and wrapped the ways JSON encoders do."""
+    lines = [data[i:i + 76] for i in range(0, len(data), 76)]
+    escaped = "\\n".join(lines).replace("/", "\\/").replace("+", "\\u002B").replace("=", "\\u003d")
+    escaped += "\\r\\n"
+    return (
+        '{"candidates": [{"content": {"parts": [{"text": "a \\"quoted\\" \\\\ reply"}, '
+        '{"inlineData": {"mimeType": "image/png", "data": "' + escaped + '"}}]}}]}'
+    ).encode()
+
+
+def decode(body, size):
+    decoder = InlineDataDecoder()
+    out = b""
+    for i in range(0, len(body), size):
+        out += decoder.feed(body[i:i + size])
+    return decoder, out
+
+
+def test_escaped_body_is_valid_json():
+    body = escaped_body(base64.b64encode(IMAGE).decode())
+    data = json.loads(body)["candidates"][0]["content"]["parts"][1]["inlineData"]["data"]
+    assert base64.b64decode(data) == IMAGE
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 6, 7, 64, 4096])
+def test_escaped_body_split_across_chunks(size):
+    decoder, out = decode(escaped_body(base64.b64encode(IMAGE).decode()), size)
+    assert decoder.done
+    assert out == IMAGE
+
+
+def test_invalid_escape_raises_value_error():
+    body = b'{"inlineData": {"data": "QUJD\\x"}}'
+    with pytest.raises(ValueError):
+        decode(body, 4)
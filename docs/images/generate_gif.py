@@ -7,12 +7,25 @@ Produces:
   - Optimized GIF (280px, 128 colors) for website
   - Animated WebP (280px, quality=75) for website
 
+Each screenshot is decoded once and fanned out to every output width.
+Outputs whose inputs (screenshots, parameters, this script) are unchanged
+since the last run are skipped; pass --force to rebuild everything. The
+manifest of fingerprints is not committed: CI passes --manifest with a path
+it caches between runs (the outputs themselves are committed).
+--profile / --profile-trace report the time spent decoding, resizing,
+quantizing and encoding (see stage_profiler.py next to the ad creatives).
+
 Usage:
-    python3 docs/images/generate_gif.py
+    python3 docs/images/generate_gif.py [--force] [--manifest cache/gif-manifest.json]
+        [--profile] [--profile-trace trace.json]
 """
 
+import argparse
 import glob
+import hashlib
+import json
 import os
+import sys
 from PIL import Image
 
 # --- Parameters ---
@@ -20,6 +33,9 @@ INPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(INPUT_DIR, "..", ".."))
 WEBSITE_ASSETS = os.path.join(PROJECT_ROOT, "firebase", "hosting", "src", "assets", "images")
 
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "business", "campaigns", "meta-ads", "creatives"))
+import stage_profiler  # noqa: E402
+
 # Original output (docs)
 OUTPUT_PATH = os.path.join(INPUT_DIR, "whatsapp-criar-os.gif")
 OUTPUT_WIDTH = 360
@@ -29,68 +45,167 @@ WEB_OUTPUT_GIF = os.path.join(WEBSITE_ASSETS, "whatsapp-bot-demo.gif")
 WEB_OUTPUT_WEBP = os.path.join(WEBSITE_ASSETS, "whatsapp-bot-demo.webp")
 WEB_WIDTH = 240
 WEB_COLORS = 32
+# Frames sampled to build the shared GIF palette
+PALETTE_SAMPLE_FRAMES = 8
+# Dithering against the shared palette; Image.Dither.NONE compresses about
+# 15% better but bands the photos in the chat
+WEB_DITHER = Image.Dither.FLOYDSTEINBERG
+# Color of the reserved transparent palette slot; must not be a real color,
+# since Pillow matches palette entries by value when writing frames
+TRANSPARENT_KEY = (255, 0, 254)
 
 CROP_TOP = 88
 CROP_BOTTOM = 88
 FRAME_DELAY_MS = 2500
 LAST_FRAME_DELAY_MS = 4000
 
+# Fingerprints of the inputs of each output, keyed by path relative to PROJECT_ROOT.
+# Gitignored; CI keeps it between runs by passing --manifest with a cached path.
+MANIFEST_PATH = os.path.join(INPUT_DIR, ".generate_gif-manifest.json")
 
-def load_frames(target_width):
-    """Load and process screenshot frames at a given width."""
-    pattern = os.path.join(INPUT_DIR, "Captura de Tela *.png")
-    files = sorted(glob.glob(pattern))
 
-    if not files:
-        print("No screenshots found!")
-        return []
+def list_screenshots():
+    """Return the sorted screenshot paths that make up the animation."""
+    return sorted(glob.glob(os.path.join(INPUT_DIR, "Captura de Tela *.png")))
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-    print(f"Found {len(files)} screenshots")
 
-    frames = []
+def output_fingerprint(files, params):
+    """Hash this script, the source screenshots and the output parameters."""
+    h = hashlib.sha256()
+    h.update(file_digest(os.path.abspath(__file__)).encode())
+    h.update(json.dumps(params, sort_keys=True).encode())
+    h.update(json.dumps([CROP_TOP, CROP_BOTTOM, FRAME_DELAY_MS, LAST_FRAME_DELAY_MS]).encode())
     for f in files:
-        img = Image.open(f)
-        w, h = img.size
+        h.update(file_digest(f).encode())
+    return h.hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
 
-        cropped = img.crop((0, CROP_TOP, w, h - CROP_BOTTOM))
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
 
-        crop_w, crop_h = cropped.size
-        new_h = int(crop_h * target_width / crop_w)
+
+def fit_frame(cropped, target_width):
+    """Resize a cropped RGBA screenshot to target_width and flatten onto white."""
+    crop_w, crop_h = cropped.size
+    new_h = int(crop_h * target_width / crop_w)
+    with stage_profiler.stage("resize"):
         resized = cropped.resize((target_width, new_h), Image.LANCZOS)
 
         rgb = Image.new("RGB", resized.size, (255, 255, 255))
         rgb.paste(resized, mask=resized.split()[3])
+    return rgb
 
-        frames.append(rgb)
-        print(f"  Processed: {os.path.basename(f)} -> {target_width}x{new_h}")
 
-    return frames
+def iter_frames(files, widths):
+    """Decode each screenshot once and yield {width: frame} for every width.
 
+    Only the current full-size source is held in memory; callers decide
+    which of the resized frames to keep (the encoders keep all of theirs).
+    """
+    for f in files:
+        with stage_profiler.stage("decode"), Image.open(f) as img:
+            w, h = img.size
+            cropped = img.crop((0, CROP_TOP, w, h - CROP_BOTTOM))
+        frames = {width: fit_frame(cropped, width) for width in widths}
+        sizes = ", ".join(f"{fr.width}x{fr.height}" for fr in frames.values())
+        print(f"  Processed: {os.path.basename(f)} -> {sizes}")
+        yield frames
 
-def save_gif(frames, output_path, quantize_colors=None):
-    """Save frames as animated GIF, optionally with reduced color palette."""
-    durations = [FRAME_DELAY_MS] * len(frames)
-    durations[-1] = LAST_FRAME_DELAY_MS
 
+def load_frames(target_width):
+    """Load and process screenshot frames at a given width."""
+    files = list_screenshots()
+    if not files:
+        print("No screenshots found!")
+        return []
+
+    print(f"Found {len(files)} screenshots")
+    return [frames[target_width] for frames in iter_frames(files, [target_width])]
+
+
+def frame_durations(frame_count):
+    durations = [FRAME_DELAY_MS] * frame_count
+    durations[-1] = LAST_FRAME_DELAY_MS
+    return durations
+
+
+def build_shared_palette(frames, colors, max_samples=PALETTE_SAMPLE_FRAMES):
+    """Quantize a montage of sampled frames into one palette for the whole GIF.
+
+    Returns a palette image with colors - 1 entries to quantize frames
+    against; the last index is left free for transparency.
+    """
+    step = max(1, -(-len(frames) // max_samples))
+    sample = frames[::step]
+    montage = Image.new("RGB", (max(f.width for f in sample), sum(f.height for f in sample)))
+    y = 0
+    for f in sample:
+        montage.paste(f, (0, y))
+        y += f.height
+
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(montage.quantize(colors - 1).getpalette()[: (colors - 1) * 3])
+    return palette
+
+
+def save_gif(frames, output_path, frame_count, quantize_colors=None):
+    """Save frames as animated GIF, optionally with reduced color palette.
+
+    Full-color frames may be any iterable (e.g. a generator from
+    iter_frames). That streams the decoding: only one full-size screenshot
+    is open at a time. The resized frames still all end up in memory, since
+    Pillow collects every append_images frame before it writes the GIF
+    (quantizing also lists them up front). With quantize_colors, all
+    frames share one palette built from a sample of the frames. Pillow then
+    writes each frame as the rectangle that changed since the previous one,
+    with unchanged pixels in it set to the reserved transparent index.
+    """
+    save_kwargs = {}
+    name = os.path.basename(output_path)
     if quantize_colors:
-        quantized = [f.quantize(colors=quantize_colors) for f in frames]
-        quantized[0].save(
+        frames = list(frames)
+        with stage_profiler.stage("quantize", creative=name):
+            palette = build_shared_palette(frames, quantize_colors)
+            transparent = quantize_colors - 1
+            full_palette = palette.getpalette()[: transparent * 3] + list(TRANSPARENT_KEY)
+            quantized = []
+            for f in frames:
+                q = f.quantize(palette=palette, dither=WEB_DITHER)
+                q.putpalette(full_palette)
+                quantized.append(q)
+        frames = quantized
+        save_kwargs = dict(palette=bytes(full_palette), transparency=transparent, disposal=1)
+
+    # A lazy frame stream is decoded and resized inside this stage, as
+    # Pillow pulls (and keeps) each frame before writing the file
+    with stage_profiler.stage("encode", creative=name) as record:
+        frames = iter(frames)
+        first = next(frames)
+        first.save(
             output_path,
             save_all=True,
-            append_images=quantized[1:],
-            duration=durations,
-            loop=0,
-            optimize=True,
-        )
-    else:
-        frames[0].save(
-            output_path,
-            save_all=True,
-            append_images=frames[1:],
-            duration=durations,
+            append_images=frames,
+            duration=frame_durations(frame_count),
             loop=0,
             optimize=True,
+            **save_kwargs,
         )
+        record["bytes"] = os.path.getsize(output_path)
 
     size_kb = os.path.getsize(output_path) / 1024
     print(f"  GIF saved: {output_path}")
@@ -99,17 +214,16 @@ def save_gif(frames, output_path, quantize_colors=None):
 
 def save_webp(frames, output_path, quality=75):
     """Save frames as animated WebP."""
-    durations = [FRAME_DELAY_MS] * len(frames)
-    durations[-1] = LAST_FRAME_DELAY_MS
-
-    frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=frames[1:],
-        duration=durations,
-        loop=0,
-        quality=quality,
-    )
+    with stage_profiler.stage("encode", creative=os.path.basename(output_path)) as record:
+        frames[0].save(
+            output_path,
+            save_all=True,
+            append_images=frames[1:],
+            duration=frame_durations(len(frames)),
+            loop=0,
+            quality=quality,
+        )
+        record["bytes"] = os.path.getsize(output_path)
 
     size_kb = os.path.getsize(output_path) / 1024
     print(f"  WebP saved: {output_path}")
@@ -117,26 +231,87 @@ def save_webp(frames, output_path, quality=75):
 
 
 def main():
-    # 1. Original GIF (360px, full colors) for docs
-    print("\n=== Original GIF (360px) ===")
-    frames_original = load_frames(OUTPUT_WIDTH)
-    if not frames_original:
-        return
-    save_gif(frames_original, OUTPUT_PATH)
-
-    # 2. Optimized versions for website (280px)
-    print(f"\n=== Website GIF ({WEB_WIDTH}px, {WEB_COLORS} colors) ===")
-    frames_web = load_frames(WEB_WIDTH)
+    parser = argparse.ArgumentParser(description="Generate the WhatsApp demo GIF/WebP.")
+    parser.add_argument("--force", action="store_true", help="Rebuild outputs even if up to date")
+    parser.add_argument(
+        "--manifest", default=MANIFEST_PATH, metavar="JSON",
+        help="Build manifest to read and update; point it at a cached path to keep "
+        "incremental builds across CI runs",
+    )
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing report")
+    parser.add_argument("--profile-trace", metavar="JSON", help="Write per-stage timings as a Chrome trace")
+    args = parser.parse_args()
+    stage_profiler.enable(args.profile or bool(args.profile_trace))
 
-    os.makedirs(WEBSITE_ASSETS, exist_ok=True)
+    files = list_screenshots()
+    if not files:
+        print("No screenshots found!")
+        return
+    print(f"Found {len(files)} screenshots")
 
-    save_gif(frames_web, WEB_OUTPUT_GIF, quantize_colors=WEB_COLORS)
+    manifest = load_manifest(args.manifest)
+    outputs = {
+        OUTPUT_PATH: {"format": "gif", "width": OUTPUT_WIDTH},
+        WEB_OUTPUT_GIF: {"format": "gif", "width": WEB_WIDTH, "colors": WEB_COLORS},
+        WEB_OUTPUT_WEBP: {"format": "webp", "width": WEB_WIDTH, "quality": 75},
+    }
+    stale = {}
+    for path, params in outputs.items():
+        key = os.path.relpath(path, PROJECT_ROOT)
+        fingerprint = output_fingerprint(files, params)
+        if args.force or manifest.get(key) != fingerprint or not os.path.exists(path):
+            stale[path] = fingerprint
+        else:
+            print(f"Skipped (up to date): {key}")
+    if not stale:
+        print("\nNothing to do, all outputs are up to date.")
+        return
 
-    # 3. Animated WebP for website
-    print(f"\n=== Website WebP ({WEB_WIDTH}px, q=75) ===")
-    save_webp(frames_web, WEB_OUTPUT_WEBP, quality=75)
+    # Decode every screenshot once and fan it out to all the widths needed.
+    # The docs GIF consumes its frames as they stream by; only the small
+    # website frames are kept, since both website encoders need them.
+    web_needed = WEB_OUTPUT_GIF in stale or WEB_OUTPUT_WEBP in stale
+    widths = [w for w, needed in ((OUTPUT_WIDTH, OUTPUT_PATH in stale), (WEB_WIDTH, web_needed)) if needed]
+    stream = iter_frames(files, widths)
+    frames_web = []
 
-    print(f"\nDone! {len(frames_original)} frames processed.")
+    # 1. Original GIF (360px, full colors) for docs
+    if OUTPUT_PATH in stale:
+        print(f"\n=== Original GIF ({OUTPUT_WIDTH}px) ===")
+
+        def docs_frames():
+            for frames in stream:
+                if web_needed:
+                    frames_web.append(frames[WEB_WIDTH])
+                yield frames[OUTPUT_WIDTH]
+
+        save_gif(docs_frames(), OUTPUT_PATH, len(files))
+    elif web_needed:
+        frames_web = [frames[WEB_WIDTH] for frames in stream]
+
+    # 2. Optimized versions for website
+    if web_needed:
+        os.makedirs(WEBSITE_ASSETS, exist_ok=True)
+
+        if WEB_OUTPUT_GIF in stale:
+            print(f"\n=== Website GIF ({WEB_WIDTH}px, {WEB_COLORS} colors) ===")
+            save_gif(frames_web, WEB_OUTPUT_GIF, len(frames_web), quantize_colors=WEB_COLORS)
+
+        # 3. Animated WebP for website
+        if WEB_OUTPUT_WEBP in stale:
+            print(f"\n=== Website WebP ({WEB_WIDTH}px, q=75) ===")
+            save_webp(frames_web, WEB_OUTPUT_WEBP, quality=75)
+
+    for path, fingerprint in stale.items():
+        manifest[os.path.relpath(path, PROJECT_ROOT)] = fingerprint
+    save_manifest(manifest, args.manifest)
+
+    if args.profile:
+        stage_profiler.print_summary()
+    if args.profile_trace:
+        stage_profiler.write_chrome_trace(args.profile_trace)
+
+    print(f"\nDone! {len(files)} frames, {len(stale)} outputs rebuilt.")
 
 
 if __name__ == "__main__":